@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the player data scripts.
+
+Parser microbenchmarks time the infobox parser on the recorded articles in
+benchmarks/fixtures (small, huge, malformed, no infobox). The pipeline
+benchmark runs the whole resolve -> fetch -> parse pipeline against a local
+fake MediaWiki server with configurable latency and 429 injection, once
+with an empty page cache and once with a warm one. Results are saved as
+JSON; --compare prints the change from an earlier result file.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+
+from playerdata import client, wikipedia
+from playerdata.cache import PageCache
+from playerdata.fakewiki import FakeWiki, load_fixtures, populate
+from playerdata.honours import parse_honours
+from playerdata.infobox import clean_wiki_text, find_infobox, parse_infobox, tokenize_infobox
+from playerdata.pipeline import iter_player_pages
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+RESULTS_DIR = SCRIPT_DIR / "benchmarks" / "results"
+
+# Every SEARCH_EVERY-th benchmark player is listed under a name that is not
+# a page title, so the search fallback is exercised too
+SEARCH_EVERY = 20
+
+def time_call(fn, *args, repeat=5):
+    """Time `fn(*args)`: best and median seconds per call over `repeat` rounds."""
+    timer = timeit.Timer(lambda: fn(*args))
+    number, _ = timer.autorange()
+    rounds = [total / number for total in timer.repeat(repeat, number)]
+    return {'best': min(rounds), 'median': statistics.median(rounds), 'calls': number}
+
+def bench_parser(fixtures, repeat=5):
+    """Microbenchmarks of the parser's stages on every fixture."""
+    results = {}
+    for name, content in fixtures.items():
+        infobox = find_infobox(content)
+        values = [param[1] for param in tokenize_infobox(infobox)] if infobox else []
+        results[name] = {
+            'bytes': len(content.encode('utf-8')),
+            'parse_infobox': time_call(parse_infobox, content, repeat=repeat),
+            'find_infobox': time_call(find_infobox, content, repeat=repeat),
+            'parse_honours': time_call(parse_honours, content, repeat=repeat),
+        }
+        if infobox:
+            results[name]['tokenize_infobox'] = time_call(tokenize_infobox, infobox, repeat=repeat)
+            results[name]['clean_wiki_text'] = time_call(
+                lambda: [clean_wiki_text(value) for value in values], repeat=repeat
+            )
+        print(f"  {name:<12} {results[name]['bytes']:>8} bytes  "
+              f"parse_infobox {results[name]['parse_infobox']['best'] * 1e6:>10.1f} µs")
+    return results
+
+def run_pipeline(names, cache, concurrency, workers):
+    """One pass of the pipeline over `names`; returns its measurements."""
+    client.stats = client.RequestStats()
+    found = 0
+    start = time.perf_counter()
+    for _, page in iter_player_pages(names, concurrency, cache, workers):
+        if page is not None and page.get('parsed') is not None:
+            found += 1
+    seconds = time.perf_counter() - start
+    return {
+        'seconds': seconds,
+        'players_per_second': len(names) / seconds,
+        'players_parsed': found,
+        'requests': client.stats.requests,
+        'retries': client.stats.retries,
+        'failed_requests': client.stats.failures,
+        'kilobytes': client.stats.bytes / 1024,
+        'kilobytes_per_player': client.stats.bytes / 1024 / len(names),
+    }
+
+def bench_pipeline(fixtures, players, latency, throttle, retry_after, rate, concurrency, workers, full_pages=False):
+    """End-to-end runs against the fake wiki: a cold page cache, then a warm one."""
+    titles = [f"Benchmark Player {i:05d}" for i in range(players)]
+    names = [f"Player {i:05d}" if i % SEARCH_EVERY == SEARCH_EVERY - 1 else title
+             for i, title in enumerate(titles)]
+
+    wiki = FakeWiki(latency, throttle, retry_after, seed=0)
+    populate(wiki, titles, fixtures)
+    results = {'config': {
+        'players': players, 'latency': latency, 'throttle': throttle, 'retry_after': retry_after,
+        'rate': rate, 'concurrency': concurrency, 'workers': workers or os.cpu_count(),
+        'full_pages': full_pages,
+    }}
+    with wiki, tempfile.TemporaryDirectory() as tmp:
+        wikipedia.configure(api_url=wiki.url, lead_only=not full_pages)
+        client.configure(rate=rate, concurrency=concurrency)
+        cache = PageCache(Path(tmp) / "pages.sqlite")
+        try:
+            for run in ('cold', 'warm'):
+                throttled = wiki.throttled
+                results[run] = run_pipeline(names, cache, concurrency, workers)
+                results[run]['throttled'] = wiki.throttled - throttled
+                print(f"  {run:<5} {results[run]['seconds']:>7.2f} s  "
+                      f"{results[run]['players_per_second']:>8.1f} players/s  "
+                      f"{results[run]['requests']} requests ({results[run]['throttled']} throttled), "
+                      f"{results[run]['kilobytes_per_player']:.1f} KB/player")
+        finally:
+            cache.close()
+    return results
+
+def git_revision():
+    """Short commit hash of the working tree (with -dirty if modified), or None."""
+    try:
+        return subprocess.run(
+            ['git', 'describe', '--always', '--dirty'], cwd=SCRIPT_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def flatten(results, prefix=''):
+    """{'a.b.c': number} for every number in a nested result dict."""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, path + '.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+def compare(old, new, threshold):
+    """
+    Print the timings that changed between two result files.
+
+    Returns the number of regressions: timings more than `threshold`
+    percent slower (or throughput that much lower).
+    """
+    old_flat = flatten({'parser': old.get('parser', {}), 'pipeline': old.get('pipeline', {})})
+    new_flat = flatten({'parser': new.get('parser', {}), 'pipeline': new.get('pipeline', {})})
+    regressions = 0
+    print(f"\nCompared with {old.get('revision') or 'earlier run'} ({old.get('date')}):")
+    for key in sorted(old_flat.keys() & new_flat.keys()):
+        if key.endswith('per_second'):
+            higher_is_better = True
+        elif key.endswith(('.best', '.median', '.seconds')):
+            higher_is_better = False
+        else:
+            continue
+        before, after = old_flat[key], new_flat[key]
+        if not before:
+            continue
+        change = (after - before) / before * 100
+        worse = change < -threshold if higher_is_better else change > threshold
+        better = change > threshold if higher_is_better else change < -threshold
+        regressions += worse
+        marker = '❌' if worse else '✅' if better else '  '
+        print(f"  {marker} {key:<50} {before:>12.6g} → {after:>12.6g}  ({change:+.1f}%)")
+    return regressions
+
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Benchmark the player data parser and pipeline.")
+    parser.add_argument('--output', type=Path,
+                        help=f"result file (default: {RESULTS_DIR.relative_to(SCRIPT_DIR)}/<revision>.json)")
+    parser.add_argument('--compare', type=Path, metavar='RESULTS',
+                        help="earlier result file to compare against (exits with 1 on regressions)")
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help="percent change counted as a regression (default: %(default)s)")
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="timing rounds per parser benchmark (default: %(default)s)")
+    parser.add_argument('--skip-parser', action='store_true', help="skip the parser microbenchmarks")
+    parser.add_argument('--skip-pipeline', action='store_true', help="skip the end-to-end pipeline benchmark")
+    parser.add_argument('--players', type=int, default=500,
+                        help="players served by the fake wiki (default: %(default)s)")
+    parser.add_argument('--latency', type=float, default=0.02,
+                        help="seconds the fake wiki takes per request (default: %(default)s)")
+    parser.add_argument('--throttle', type=float, default=0.02,
+                        help="share of requests the fake wiki refuses with 429 (default: %(default)s)")
+    parser.add_argument('--retry-after', type=int, default=1,
+                        help="Retry-After sent with those 429s (default: %(default)s)")
+    parser.add_argument('--rate', type=float, default=50.0,
+                        help="API requests per second allowed (default: %(default)s)")
+    parser.add_argument('--concurrency', type=int, default=client.DEFAULT_CONCURRENCY,
+                        help="API requests in flight (default: %(default)s)")
+    parser.add_argument('--workers', type=int, help="parser processes (default: one per CPU core)")
+    parser.add_argument('--full-pages', action='store_true',
+                        help="download whole articles instead of lead sections, as before")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Run the benchmarks and save the results."""
+    args = parse_args(argv)
+    fixtures = load_fixtures()
+    results = {
+        'revision': git_revision(),
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+    if not args.skip_parser:
+        print(f"Parser ({len(fixtures)} fixtures):")
+        results['parser'] = bench_parser(fixtures, args.repeat)
+    if not args.skip_pipeline:
+        print(f"Pipeline ({args.players} players, {args.latency * 1000:.0f} ms latency, "
+              f"{args.throttle:.0%} throttled):")
+        results['pipeline'] = bench_pipeline(
+            fixtures, args.players, args.latency, args.throttle, args.retry_after,
+            args.rate, args.concurrency, args.workers, args.full_pages,
+        )
+
+    output = args.output or RESULTS_DIR / f"{results['revision'] or 'results'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+        f.write('\n')
+    print(f"\nResults saved to {output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(json.load(f), results, args.threshold)
+        if regressions:
+            print(f"\n{regressions} timings regressed by more than {args.threshold:g}%")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Merge the result files of sharded update runs into the player data.
+
+    python scripts/update-player-data.py --shard 1/2 &
+    python scripts/update-player-data.py --shard 2/2 &
+    wait
+    python scripts/merge-player-data.py scripts/.cache/shards/shard-*.json
+
+Applies every shard's updates to the target CSVs (players.csv,
+player-success.csv), rebuilds players.json and records the pages players
+resolved to in the player index, exactly as an unsharded run would. No
+network access is needed.
+"""
+
+import argparse
+import logging
+from pathlib import Path
+
+from playerdata import log as logsetup
+from playerdata.cache import DEFAULT_CACHE_PATH, PageCache
+from playerdata.clubs import ClubRegistry
+from playerdata.csvfile import apply_updates
+from playerdata.dataset import resolve_clubs
+from playerdata.index import DEFAULT_INDEX_PATH, PlayerIndex
+from playerdata.journal import fingerprint
+from playerdata.shards import merge_results, read_shard
+from playerdata.targets import select_targets
+
+log = logging.getLogger("merge-player-data")
+
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Merge sharded player data updates into the player CSVs.")
+    parser.add_argument('shards', nargs='+', type=Path, metavar='SHARD',
+                        help="result files written by update-player-data.py --shard")
+    parser.add_argument('--cache-path', type=Path, default=DEFAULT_CACHE_PATH,
+                        help="page cache to read stored club resolutions from, if present (default: %(default)s)")
+    parser.add_argument('--index-path', type=Path, default=DEFAULT_INDEX_PATH,
+                        help="player name -> Wikipedia page id index (default: %(default)s)")
+    parser.add_argument('--force', action='store_true',
+                        help="merge shards computed from another version of the CSV or parser")
+    parser.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help="least severe messages to log (default: %(default)s)")
+    parser.add_argument('--log-format', default='text', choices=['text', 'json'],
+                        help="plain messages, or one JSON object per line (default: %(default)s)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Merge shard results into the CSV, dataset and index."""
+    args = parse_args(argv)
+    logsetup.configure(args.log_level, args.log_format)
+    shards = [read_shard(path) for path in args.shards]
+    names = {tuple(data['targets']) for data in shards}
+    if len(names) > 1:
+        log.error("Error: the shards were run for different datasets: %s",
+                  "; ".join(", ".join(found) for found in sorted(names)))
+        return 1
+    targets = select_targets(shards[0]['targets'])
+    files = ", ".join(target.filename for target in targets)
+    tables = {target: target.read() for target in targets}
+    expected = fingerprint(target.path() for target in targets)
+
+    for path, data in zip(args.shards, shards):
+        if data['fingerprint'] != expected:
+            if not args.force:
+                log.error("Error: %s was computed from another version of %s or of the parser "
+                          "(use --force to merge it anyway)", path, files)
+                return 1
+            log.warning("⚠️  %s was computed from another version of %s or of the parser", path, files)
+    counts = {data['shard'][1] for data in shards}
+    if len(counts) > 1:
+        log.warning("⚠️  Merging shards of different splits: %s", ", ".join(f"n={n}" for n in sorted(counts)))
+    for count in counts:
+        missing = set(range(1, count + 1)) - {index for index, n in (data['shard'] for data in shards) if n == count}
+        if missing:
+            log.warning("⚠️  Missing shards %s of %d; their players are left as they are",
+                        ", ".join(map(str, sorted(missing))), count)
+
+    results, clubs, conflicts = merge_results(shards)
+    if conflicts:
+        log.info("%d players had results in several shards; kept the best of each", conflicts)
+
+    index = PlayerIndex(args.index_path)
+    updated_count = 0
+    failed_count = 0
+    players_by_name = {}
+    for target, players in tables.items():
+        for player in players:
+            players_by_name.setdefault(player['name'], []).append((target, player))
+    for player_name, result in results.items():
+        if player_name not in players_by_name:
+            continue
+        if result['page']:
+            index.record(player_name, result['page'])
+        for target, player in players_by_name[player_name]:
+            updates = result['updates'].get(target.name)
+            if updates:
+                apply_updates(player, updates)
+        if any(result['updates'].values()):
+            updated_count += 1
+        else:
+            failed_count += 1
+    uncovered = len(players_by_name.keys() - results.keys())
+
+    # Club identities as the shards resolved them (and the cache remembers)
+    cache = PageCache(args.cache_path) if args.cache_path.exists() else None
+    registry = ClubRegistry(cache, offline=True)
+    registry.add_resolutions(clubs)
+    spells = {
+        player_name: [tuple(spell) for spell in result['spells']]
+        for player_name, result in results.items()
+        if result['spells']
+    }
+    try:
+        resolve_clubs([player for target, players in tables.items() if target.clubs for player in players],
+                      spells, registry)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    # Players in no shard keep their index entries
+    index.prune(players_by_name)
+    if index.save():
+        log.info("Player index saved to %s", index.path)
+
+    written = [file for target in targets for file in target.write(tables[target], spells, registry)]
+
+    log.info("\n%s", '=' * 50)
+    log.info("✅ Merged %d shards: updated %d players", len(shards), updated_count)
+    if failed_count > 0:
+        log.warning("⚠️  Could not update %d players (manual check may be needed)", failed_count)
+    if uncovered:
+        log.warning("⚠️  %d players were not in any shard", uncovered)
+    for label, path, saved in written:
+        log.info("%s %s %s", label, "saved to" if saved else "unchanged at", path)
+    return 0 if updated_count else 1
+
+if __name__ == "__main__":
+    exit(main())
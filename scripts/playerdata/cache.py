@@ -0,0 +1,247 @@
+"""
+Revision-aware on-disk cache of Wikipedia pages.
+
+Pages are stored in SQLite keyed by pageid together with the revision id
+they were fetched at. A run first asks the API for the current revision
+ids only (cheap, no content) and downloads wikitext just for pages whose
+revision moved since the cached copy.
+
+Wikitext is stored content-addressed (by its SHA-1), and parse results are
+memoized per (content hash, parser version): replaying unchanged text
+through an unchanged parser costs a lookup, and a revision whose text is
+identical to one already seen (a revert, a null edit) is parsed only once.
+
+The cache is bounded: once the stored wikitext exceeds `max_bytes`, the
+least recently used pages are evicted.
+
+Pages fetched as just their lead section are marked as such, and only
+served to callers that are content with the lead.
+
+It also remembers which article titles (club links) resolve to, after
+redirects, so club names are only looked up again once that has expired.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from .infobox import PARSER_VERSION, PlayerStats
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / ".cache"
+DEFAULT_CACHE_PATH = DEFAULT_CACHE_DIR / "pages.sqlite"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Bumped whenever the tables change; older caches are dropped and refilled
+# (tables and columns that are only added are created in place)
+SCHEMA_VERSION = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    wikitext TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    pageid INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    revid INTEGER NOT NULL,
+    timestamp TEXT,
+    hash TEXT NOT NULL,
+    last_used REAL NOT NULL,
+    lead INTEGER NOT NULL DEFAULT 0  -- 1 when only the lead section is stored
+);
+CREATE INDEX IF NOT EXISTS pages_title ON pages (title);
+CREATE TABLE IF NOT EXISTS parses (
+    hash TEXT NOT NULL,
+    parser_version TEXT NOT NULL,
+    parsed TEXT,  -- NULL when the text has no usable infobox
+    PRIMARY KEY (hash, parser_version)
+);
+CREATE TABLE IF NOT EXISTS titles (
+    title TEXT PRIMARY KEY,
+    pageid INTEGER,  -- NULL when there is no article by that title
+    canonical TEXT,
+    resolved_at REAL NOT NULL
+);
+"""
+
+
+def content_hash(content):
+    """Content address of a page's wikitext."""
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+class PageCache:
+    """SQLite-backed page cache, safe to share between threads."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES, read=True):
+        """
+        Open (or create) the cache at `path`.
+
+        With `read=False` lookups always miss, forcing every page to be
+        downloaded again, but fetched pages are still written back.
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.read = read
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self._conn.executescript(
+                "DROP TABLE IF EXISTS pages; DROP TABLE IF EXISTS blobs; "
+                "DROP TABLE IF EXISTS parses; DROP TABLE IF EXISTS titles;"
+            )
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._conn.executescript(SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(pages)")}
+        if 'lead' not in columns:
+            self._conn.execute("ALTER TABLE pages ADD COLUMN lead INTEGER NOT NULL DEFAULT 0")
+        self._conn.commit()
+
+    def _select(self, where, args):
+        """Look up one stored page with its wikitext and memoized parse."""
+        row = self._conn.execute(
+            "SELECT pages.pageid, pages.title, pages.revid, pages.timestamp, blobs.wikitext, "
+            "       pages.hash, parses.parser_version, parses.parsed, pages.lead "
+            "FROM pages JOIN blobs ON blobs.hash = pages.hash "
+            "LEFT JOIN parses ON parses.hash = pages.hash AND parses.parser_version = ? "
+            f"WHERE {where}",
+            (PARSER_VERSION, *args),
+        ).fetchone()
+        if row is None:
+            return None
+        self._conn.execute(
+            "UPDATE pages SET last_used = ? WHERE pageid = ?", (time.time(), row[0])
+        )
+        return {
+            "pageid": row[0],
+            "title": row[1],
+            "revid": row[2],
+            "timestamp": row[3],
+            "content": row[4],
+            "hash": row[5],
+            "parser_version": row[6],
+            "parsed": PlayerStats.from_dict(json.loads(row[7])) if row[7] is not None else None,
+            "lead": bool(row[8]),
+        }
+
+    def get(self, pageid, revid, lead=False):
+        """
+        Return the cached page if it is stored at `revid`, else None.
+
+        The returned dict has 'pageid', 'title', 'revid', 'timestamp',
+        'content', 'hash', 'lead', and 'parsed'/'parser_version' when the
+        current parser's result for this text has been memoized. A stored
+        lead section is only returned with `lead=True`.
+        """
+        with self._lock:
+            page = None
+            if self.read:
+                page = self._select(
+                    "pages.pageid = ? AND pages.revid = ?" + ("" if lead else " AND pages.lead = 0"),
+                    (int(pageid), int(revid)),
+                )
+            if page is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return page
+
+    def latest(self, pageid=None, title=None):
+        """Return whatever revision is stored for a page id (or title), or None."""
+        with self._lock:
+            if pageid is not None:
+                return self._select("pages.pageid = ?", (int(pageid),))
+            return self._select("pages.title = ?", (title,))
+
+    def put(self, page):
+        """Store a freshly fetched page."""
+        digest = content_hash(page["content"])
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO blobs (hash, wikitext) VALUES (?, ?)",
+                (digest, page["content"]),
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages "
+                "(pageid, title, revid, timestamp, hash, last_used, lead) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (int(page["pageid"]), page["title"], int(page["revid"]),
+                 page.get("timestamp"), digest, time.time(), int(bool(page.get("lead")))),
+            )
+            self._conn.commit()
+
+    def put_parsed(self, content, parsed, parser_version):
+        """Memoize the parse result (a PlayerStats or None) for a page's wikitext."""
+        digest = content_hash(content)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO parses (hash, parser_version, parsed) VALUES (?, ?, ?)",
+                (digest, parser_version, json.dumps(parsed.to_dict()) if parsed is not None else None),
+            )
+            self._conn.commit()
+
+    def get_titles(self, titles, max_age):
+        """
+        Look up stored title resolutions made within the last `max_age` seconds.
+
+        Returns {title: (pageid, canonical_title)} for the titles found, with
+        (None, None) for titles that had no article.
+        """
+        titles = list(titles)
+        found = {}
+        if not self.read:
+            return found
+        with self._lock:
+            for i in range(0, len(titles), 500):
+                batch = titles[i:i + 500]
+                rows = self._conn.execute(
+                    "SELECT title, pageid, canonical FROM titles "
+                    f"WHERE resolved_at >= ? AND title IN ({', '.join('?' * len(batch))})",
+                    (time.time() - max_age, *batch),
+                )
+                for title, pageid, canonical in rows:
+                    found[title] = (pageid, canonical)
+        return found
+
+    def put_titles(self, resolved):
+        """Store title resolutions, {title: (pageid, canonical_title) or (None, None)}."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO titles (title, pageid, canonical, resolved_at) VALUES (?, ?, ?, ?)",
+                [(title, pageid, canonical, now) for title, (pageid, canonical) in resolved.items()],
+            )
+            self._conn.commit()
+
+    def evict(self):
+        """Drop least recently used pages until the stored wikitext fits in max_bytes."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM pages WHERE pageid IN ("
+                "  SELECT pageid FROM ("
+                "    SELECT pages.pageid, SUM(LENGTH(CAST(blobs.wikitext AS BLOB))) "
+                "      OVER (ORDER BY pages.last_used DESC, pages.pageid) AS running_total"
+                "    FROM pages JOIN blobs ON blobs.hash = pages.hash"
+                "  ) WHERE running_total > ?"
+                ")",
+                (self.max_bytes,),
+            )
+            # Text no page points at any more, and parses of it
+            self._conn.execute("DELETE FROM blobs WHERE hash NOT IN (SELECT hash FROM pages)")
+            self._conn.execute("DELETE FROM parses WHERE hash NOT IN (SELECT hash FROM blobs)")
+            self._conn.commit()
+            return cursor.rowcount
+
+    def close(self):
+        """Evict down to the size bound and close the database."""
+        self.evict()
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
@@ -0,0 +1,208 @@
+"""
+Shared HTTP client for the MediaWiki API.
+
+All requests go through one pooled requests.Session (keep-alive, gzip),
+are paced by a token bucket and an in-flight cap, and are retried with
+exponential backoff and jitter on connection errors, 429/5xx responses and
+MediaWiki `maxlag` errors, honouring any Retry-After the server sends.
+
+`requests` is only imported once the first request is made, so commands
+that never go online (reparse, merge, --help) start without loading it.
+"""
+
+import random
+import threading
+import time
+
+from .metrics import metrics
+from .ratelimit import TokenBucket
+
+HEADERS = {
+    "User-Agent": "SportVizExperiment/1.0 (https://github.com/ginestra/sport-viz-experiment; contact@example.com)",
+    "Accept-Encoding": "gzip, deflate",
+}
+
+# Request budget agreed with Wikipedia: requests per second, and how many
+# requests may be waiting on a response at the same time
+DEFAULT_RATE = 1.0
+DEFAULT_CONCURRENCY = 4
+
+# Ask the servers to refuse our requests while replication lag is above this
+# many seconds (https://www.mediawiki.org/wiki/Manual:Maxlag_parameter)
+MAXLAG = 5
+
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+TIMEOUT = 10
+
+
+class RetryableError(Exception):
+    """A response that should be retried, optionally after a server-given delay."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RequestStats:
+    """Thread-safe per-run request counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.bytes = 0
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+
+stats = RequestStats()
+
+_rate_limiter = TokenBucket(DEFAULT_RATE)
+_in_flight = threading.BoundedSemaphore(DEFAULT_CONCURRENCY)
+_pool_size = DEFAULT_CONCURRENCY
+_session = None
+_session_lock = threading.Lock()
+
+
+def configure(rate=None, burst=1, concurrency=None):
+    """
+    Configure the request budget.
+
+    `rate` is in requests per second, `burst` is how many requests may be sent
+    back-to-back after an idle period, and `concurrency` caps the requests in
+    flight (and sizes the connection pool to match).
+    """
+    global _rate_limiter, _in_flight, _pool_size, _session
+    if rate is not None:
+        _rate_limiter = TokenBucket(rate, burst)
+    if concurrency is not None:
+        _in_flight = threading.BoundedSemaphore(concurrency)
+        _pool_size = concurrency
+        with _session_lock:
+            if _session is not None:
+                _session.close()
+            _session = None
+
+
+def get_session():
+    """Return the shared session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            session.headers.update(HEADERS)
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=_pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def connections_opened():
+    """Number of TCP/TLS connections the shared session has opened so far."""
+    if _session is None:
+        return 0
+    total = 0
+    seen = set()
+    for adapter in _session.adapters.values():
+        if id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                total += pool.num_connections
+    return total
+
+
+def reconnects():
+    """
+    Connections opened beyond what the pool keeps alive.
+
+    The in-flight cap never lets more than `concurrency` connections be busy
+    at once, so every connection past that number replaced one that was
+    dropped (server closed keep-alive, network error, ...).
+    """
+    return max(0, connections_opened() - _pool_size)
+
+
+def parse_retry_after(value):
+    """Parse a Retry-After header (seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt):
+    """Exponential backoff with full jitter for the given retry attempt."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def _get_once(url, params):
+    """Send one request within the budget and return the decoded JSON."""
+    with _in_flight:
+        with metrics.timer("rate_limit_wait"):
+            _rate_limiter.acquire()
+        with metrics.timer("request"):
+            response = get_session().get(url, params=params, timeout=TIMEOUT)
+    stats.add(requests=1, bytes=len(response.content))
+
+    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+    if response.status_code == 429:
+        metrics.count("throttled_responses")
+    if response.status_code in RETRY_STATUSES:
+        raise RetryableError(f"HTTP {response.status_code}", retry_after)
+    response.raise_for_status()
+
+    data = response.json()
+    error = data.get("error") if isinstance(data, dict) else None
+    if error and error.get("code") == "maxlag":
+        raise RetryableError(f"maxlag: {error.get('info', '')}", retry_after)
+    return data
+
+
+def get_json(url, params):
+    """
+    GET `url` with `params` (plus maxlag) and return the decoded JSON.
+
+    Transient failures are retried up to MAX_RETRIES times; the last error is
+    raised if every attempt fails.
+    """
+    import requests
+
+    params = {"maxlag": MAXLAG, **params}
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return _get_once(url, params)
+        except (RetryableError, requests.ConnectionError, requests.Timeout) as e:
+            if attempt == MAX_RETRIES:
+                stats.add(failures=1)
+                raise
+            delay = getattr(e, "retry_after", None)
+            if delay is None:
+                delay = backoff_delay(attempt)
+            stats.add(retries=1)
+            time.sleep(min(delay, BACKOFF_MAX))
+        except (requests.RequestException, ValueError):
+            stats.add(failures=1)
+            raise
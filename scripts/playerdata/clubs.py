@@ -0,0 +1,134 @@
+"""
+Club registry: one canonical identity per club.
+
+Infoboxes name the same club in many ways: piped links with a short display
+name ("[[Chelsea F.C. Women|Chelsea]]"), links to redirects left behind by
+renames, "(women)" suffixes. Each spell is identified by the article its
+link points at (or, for unlinked clubs, its name taken as a title), and
+those titles are resolved through the API with redirects followed, 50 per
+query, to the page id of the club's current article. Resolutions are kept
+in the page cache for DEFAULT_MAX_AGE, so a run only looks up clubs it has
+not seen recently.
+
+Clubs whose title has no article keep their name as identity. Consecutive
+spells at the same club (e.g. one infobox row per season) are merged.
+"""
+
+import logging
+
+from .wikipedia import BATCH_SIZE, chunked, fetch_pages_by_title
+
+# How long a title resolution is reused before asking the API again
+DEFAULT_MAX_AGE = 30 * 24 * 3600
+
+# Characters MediaWiki does not allow in titles; a name containing one is
+# never looked up
+_INVALID_TITLE_CHARS = set('#<>[]{}|')
+
+log = logging.getLogger(__name__)
+
+
+class ClubRegistry:
+    """Maps club names and link targets to canonical club keys."""
+
+    def __init__(self, cache=None, offline=False, max_age=DEFAULT_MAX_AGE):
+        """
+        Create a registry backed by `cache` (a PageCache).
+
+        With `offline=True` only stored resolutions are used and no API
+        requests are made; other clubs are identified by name.
+        """
+        self.cache = cache
+        self.offline = offline
+        self.max_age = max_age
+        self._resolved = {}  # title -> (pageid, canonical title), (None, None) if none
+
+    @staticmethod
+    def title_for(name, link=None):
+        """The title a club is looked up by: its link target, else its name."""
+        return link or name
+
+    def resolve(self, titles):
+        """Resolve the titles not resolved yet (from the cache, then the API)."""
+        pending = sorted({
+            title for title in titles
+            if title and title not in self._resolved and not _INVALID_TITLE_CHARS.intersection(title)
+        })
+        if not pending:
+            return
+        if self.cache is not None:
+            self._resolved.update(self.cache.get_titles(pending, self.max_age))
+            pending = [title for title in pending if title not in self._resolved]
+        if self.offline or not pending:
+            return
+
+        looked_up = {}
+        for batch in chunked(pending, BATCH_SIZE):
+            try:
+                pages = fetch_pages_by_title(batch, content=False)
+            except Exception as e:
+                log.warning("Error resolving clubs starting with %s: %s", batch[0], e)
+                continue
+            for title in batch:
+                page = pages.get(title)
+                looked_up[title] = (page['pageid'], page['title']) if page else (None, None)
+        if not looked_up:
+            return
+        self._resolved.update(looked_up)
+        if self.cache is not None:
+            self.cache.put_titles(looked_up)
+        log.info("Resolved %d club titles", len(looked_up))
+
+    def resolutions(self, titles=None):
+        """Resolutions made so far, {title: (pageid, canonical title)}, optionally only for `titles`."""
+        if titles is None:
+            return dict(self._resolved)
+        return {title: self._resolved[title] for title in titles if title in self._resolved}
+
+    def add_resolutions(self, resolved):
+        """Use resolutions made elsewhere (e.g. by another shard) without looking them up."""
+        self._resolved.update(resolved)
+
+    def key(self, name, link=None):
+        """
+        Canonical key of a club: ('page', pageid) for clubs with an article,
+        else ('name', name).
+        """
+        pageid, _ = self._resolved.get(self.title_for(name, link), (None, None))
+        if pageid is not None:
+            return ('page', pageid)
+        return ('name', name)
+
+    def display_name(self, name, link=None):
+        """Name to show for a club: the title of its article, else `name`."""
+        _, canonical = self._resolved.get(self.title_for(name, link), (None, None))
+        return canonical or name
+
+    def merge_spells(self, spells):
+        """
+        Merge consecutive spells at the same club.
+
+        `spells` are (name, start, end, link) tuples, years as ints and `end`
+        None for a current spell. A spell is merged into the previous one
+        when it starts within it or the year after it ends; the merged spell
+        keeps the first one's name and link. Spells without years, or with
+        years out of order, are never merged.
+        """
+        merged = []
+        previous_key = None
+        for name, start, end, link in spells:
+            key = self.key(name, link)
+            if merged and key == previous_key and _valid(start, end):
+                last_name, last_start, last_end, last_link = merged[-1]
+                if _valid(last_start, last_end) and last_start <= start and (last_end is None or start <= last_end + 1):
+                    merged_end = None if last_end is None or end is None else max(last_end, end)
+                    merged[-1] = (last_name, last_start, merged_end, last_link)
+                    continue
+            merged.append((name, start, end, link))
+            previous_key = key
+        return merged
+
+
+def _valid(start, end):
+    """Whether a spell has a start year, and ends (if it has ended) no earlier."""
+    return start is not None and (end is None or start <= end)
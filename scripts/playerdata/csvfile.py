@@ -0,0 +1,53 @@
+"""
+Reading and writing the player CSVs in public/data.
+
+Columns are kept in a fixed logical order (new stat columns slot into
+their place, unknown ones follow alphabetically), and the files are
+written atomically and only when their content changed.
+"""
+
+import csv
+import io
+
+from .files import write_if_changed
+
+STANDARD_ORDER = [
+    'name', 'country_provenance', 'national_team',
+    'career_goals', 'career_assists', 'career_appearances',
+    'club_goals', 'club_assists', 'club_appearances',
+    'international_goals', 'international_assists', 'international_appearances',
+    'clubs_with_years'
+]
+
+
+def read_players(path):
+    """The rows of a players CSV, as dicts."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def apply_updates(player, updates):
+    """Set the non-empty fields of `updates` on a CSV row (adding new columns)."""
+    for key, value in updates.items():
+        # Only update if value exists and is different
+        if value and value != player.get(key, ''):
+            player[key] = value
+
+
+def ordered_fieldnames(players, order=STANDARD_ORDER):
+    """Every column used by `players`: those in `order` first, then the rest alphabetically."""
+    all_fieldnames = set()
+    for player in players:
+        all_fieldnames.update(player.keys())
+    ordered = [field for field in order if field in all_fieldnames]
+    ordered += sorted(all_fieldnames.difference(ordered))
+    return ordered
+
+
+def write_players(players, fieldnames, path, lineterminator='\r\n'):
+    """Write `players` to `path` (atomically, and only if it changed); returns whether it was written."""
+    output = io.StringIO(newline='')
+    writer = csv.DictWriter(output, fieldnames=fieldnames, lineterminator=lineterminator)
+    writer.writeheader()
+    writer.writerows(players)
+    return write_if_changed(path, output.getvalue())
@@ -0,0 +1,163 @@
+"""
+Structured player dataset for the frontend (public/data/players.json).
+
+The CSV stays the editable source of truth, but the frontend loads this
+columnar form instead, in a single fetch and without parsing strings:
+
+- 'columns': one array per CSV field, in row order, with the stat columns
+  as numbers (null when empty);
+- 'clubs': the canonical club names (see clubs.py), each stored once and
+  referenced by index;
+- 'spells': the club spells as a table of parallel 'player', 'club',
+  'start' and 'end' arrays (player and club by index, years as numbers,
+  'end' null for a current spell and both years null when unknown);
+- 'edges' and 'roster': the connection graph from network.py, by index
+  into the spell table ('edges' holds the spell pairs flattened).
+
+Spells come from the parse results of the current run where available, so
+club names containing ', ' or parentheses survive intact and clubs are
+identified by the article they link to; the clubs_with_years strings are
+only parsed for players not updated. Consecutive spells at the same club
+are merged.
+"""
+
+import json
+import re
+from datetime import date
+
+from .clubs import ClubRegistry
+from .files import write_if_changed
+from .network import build_edges, build_roster
+
+STAT_COLUMNS = (
+    'career_goals', 'career_assists', 'career_appearances',
+    'club_goals', 'club_assists', 'club_appearances',
+    'international_goals', 'international_assists', 'international_appearances',
+)
+
+# "Club (2008-2010), Club (2010-present)": items are only split after a year
+# range, so that a ', ' inside a club name does not start a new item
+_ITEM_SPLIT_RE = re.compile(r'(?<=\d{4}\)), |(?<=present\)), ')
+_SPELL_RE = re.compile(r'^(.+?)\s*\((\d{4})-(\d{4}|present)\)$')
+
+
+def parse_clubs_with_years(value):
+    """
+    Split a clubs_with_years value into (club, start, end, link) spells.
+
+    Years are ints and `end` is None for current spells; items without
+    parseable years come back with both years None. `link` is always None
+    (the CSV only keeps display names).
+    """
+    spells = []
+    for item in _ITEM_SPLIT_RE.split(value or ''):
+        match = _SPELL_RE.match(item)
+        if match:
+            end = None if match.group(3) == 'present' else int(match.group(3))
+            spells.append((match.group(1), int(match.group(2)), end, None))
+        elif item:
+            spells.append((item, None, None, None))
+    return spells
+
+
+def spells_from_stats(data):
+    """(club, start, end, link) spells of a PlayerStats, with years as ints."""
+    return [
+        (club.name, int(club.start), None if club.end == 'present' else int(club.end), club.link)
+        for club in data.clubs
+    ]
+
+
+def format_spells(spells):
+    """Inverse of parse_clubs_with_years()."""
+    return ', '.join(
+        name if start is None else f"{name} ({start}-{'present' if end is None else end})"
+        for name, start, end, _ in spells
+    )
+
+
+def row_spells(player, spells):
+    """A CSV row's spells: from `spells` (by player name) if there, else its clubs_with_years."""
+    found = spells.get(player['name'])
+    if found is None:
+        found = parse_clubs_with_years(player.get('clubs_with_years'))
+    return found
+
+
+def resolve_clubs(players, spells, registry):
+    """Resolve the clubs of every row with `registry`, in one batched pass."""
+    registry.resolve(
+        registry.title_for(name, link)
+        for player in players
+        for name, _, _, link in row_spells(player, spells)
+    )
+
+
+def _number(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def build_dataset(players, fieldnames, spells=None, registry=None):
+    """
+    Build the JSON-ready dataset for CSV rows.
+
+    `fieldnames` orders the columns (clubs_with_years is replaced by the
+    spell table). `spells` maps player names to (club, start, end, link)
+    spells that take precedence over the row's clubs_with_years. Clubs are
+    identified through `registry`, a ClubRegistry the clubs have been
+    resolved with (see resolve_clubs()); by default they are told apart by
+    name only.
+    """
+    spells = spells or {}
+    registry = registry or ClubRegistry(offline=True)
+    current_year = date.today().year
+
+    # Canonical clubs get small integer ids, in order of appearance
+    clubs = []
+    club_ids = {}
+    player_spells = []
+    for player in players:
+        interned = []
+        for name, start, end, link in registry.merge_spells(row_spells(player, spells)):
+            key = registry.key(name, link)
+            if key not in club_ids:
+                club_ids[key] = len(clubs)
+                clubs.append(registry.display_name(name, link))
+            interned.append((club_ids[key], start, end))
+        player_spells.append(interned)
+
+    columns = {}
+    for field in fieldnames:
+        if field == 'clubs_with_years':
+            continue
+        if field in STAT_COLUMNS:
+            columns[field] = [_number(player.get(field)) for player in players]
+        else:
+            columns[field] = [player.get(field) or '' for player in players]
+
+    rows = [
+        (player, club, start, end)
+        for player, interned in enumerate(player_spells)
+        for club, start, end in interned
+    ]
+    return {
+        'columns': columns,
+        'clubs': clubs,
+        'spells': {
+            'player': [row[0] for row in rows],
+            'club': [row[1] for row in rows],
+            'start': [row[2] for row in rows],
+            'end': [row[3] for row in rows],
+        },
+        'edges': [index for pair in build_edges(rows, current_year) for index in pair],
+        'roster': build_roster(rows, current_year),
+    }
+
+
+def write_dataset(players, fieldnames, path, spells=None, registry=None):
+    """Write the dataset for `players` to `path` (atomically, and only if it changed); returns whether it was written."""
+    dataset = build_dataset(players, fieldnames, spells, registry)
+    return write_if_changed(path, json.dumps(dataset, ensure_ascii=False, separators=(',', ':')) + '\n')
@@ -0,0 +1,159 @@
+"""
+Offline ingestion from a Wikipedia XML dump (pages-articles*.xml.bz2).
+
+The dump is decompressed and parsed as a stream: each <page> element is
+cleared from the tree as soon as it has been read, so memory stays flat
+however large the dump is. Only pages whose titles belong to the roster
+(directly or through a redirect) and that pass the football infobox
+pre-filter are sent to a process pool for infobox parsing.
+"""
+
+import bz2
+import logging
+import os
+import xml.etree.ElementTree as ET
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from .infobox import PARSER_VERSION, has_football_infobox
+from .metrics import metrics
+from .pipeline import parse_worker
+
+log = logging.getLogger(__name__)
+
+
+def normalize_title(name):
+    """Normalize a player name the way MediaWiki normalizes page titles."""
+    title = ' '.join(name.replace('_', ' ').split())
+    return title[:1].upper() + title[1:]
+
+
+def _open_dump(path):
+    """Open a dump for binary reading, decompressing .bz2 on the fly."""
+    if str(path).endswith('.bz2'):
+        return bz2.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def iter_dump_pages(path):
+    """
+    Stream the article pages (namespace 0) of a dump.
+
+    Yields page dicts with 'pageid', 'title', 'revid', 'timestamp',
+    'redirect' (target title or None) and 'content'.
+    """
+    with _open_dump(path) as f:
+        context = ET.iterparse(f, events=('start', 'end'))
+        _, root = next(context)
+        ns = root.tag[:root.tag.index('}') + 1] if root.tag.startswith('{') else ''
+
+        for event, elem in context:
+            if event != 'end' or elem.tag != ns + 'page':
+                continue
+
+            if elem.findtext(ns + 'ns') == '0':
+                redirect = elem.find(ns + 'redirect')
+                revision = elem.find(ns + 'revision')
+                yield {
+                    'pageid': int(elem.findtext(ns + 'id')),
+                    'title': elem.findtext(ns + 'title'),
+                    'revid': int(revision.findtext(ns + 'id')) if revision is not None else None,
+                    'timestamp': revision.findtext(ns + 'timestamp') if revision is not None else None,
+                    'redirect': redirect.get('title') if redirect is not None else None,
+                    'content': revision.findtext(ns + 'text') if revision is not None else None,
+                }
+
+            # Drop everything parsed so far; the page has been consumed
+            root.clear()
+
+
+def _scan(path, targets, pool, max_pending, cache):
+    """
+    One pass over the dump for the titles in `targets` (title -> player names).
+
+    Redirect pages whose title is a target add their destination as a new
+    target. Yields (player_name, page) for every target article found, and
+    returns the redirect destinations still not found, which may have
+    streamed past before their redirect was seen.
+    """
+    redirected = set()
+    pending = {}
+
+    def finish(future):
+        page, names = pending.pop(future)
+        page['parsed'], seconds = future.result()
+        metrics.observe('parse', seconds)
+        page['parser_version'] = PARSER_VERSION
+        if cache is not None:
+            cache.put_parsed(page['content'], page['parsed'], PARSER_VERSION)
+        for name in names:
+            yield name, page
+
+    for page in iter_dump_pages(path):
+        title = page['title']
+        names = targets.get(title)
+        if not names:
+            continue
+
+        if page['redirect']:
+            target = normalize_title(page['redirect'].split('#', 1)[0])
+            targets.setdefault(target, []).extend(names)
+            targets[title] = []
+            redirected.add(target)
+            continue
+
+        targets[title] = []
+        if cache is not None and page['revid'] is not None and page['content']:
+            cache.put(page)
+
+        if not has_football_infobox(page['content']):
+            # Not a footballer article; nothing for the parser to find
+            page['parsed'] = None
+            page['parser_version'] = PARSER_VERSION
+            for name in names:
+                yield name, page
+            continue
+
+        while len(pending) >= max_pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from finish(future)
+        pending[pool.submit(parse_worker, page['content'])] = (page, names)
+
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield from finish(future)
+
+    return {title for title in redirected if targets[title]}
+
+
+def iter_dump_player_pages(path, player_names, workers=None, cache=None, index=None):
+    """
+    Find and parse the roster's articles in a local dump.
+
+    Yields (player_name, page) pairs like pipeline.iter_player_pages, with the
+    parse result already attached to each page. `page` is None for players
+    whose article isn't in the dump. Parsing runs on `workers` processes
+    (default: one per core). When a redirect for a player is only seen after
+    the article it points to, a second pass picks up those articles.
+    Players with an entry in `index` are looked up by their canonical title.
+    """
+    workers = workers or os.cpu_count() or 1
+    targets = {}
+    for name in player_names:
+        entry = index.get(name) if index is not None else None
+        title = entry['title'] if entry else normalize_title(name)
+        targets.setdefault(title, []).append(name)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        missed = yield from _scan(path, targets, pool, workers * 4, cache)
+        if missed:
+            log.info("Rescanning dump for %d redirect targets seen before their redirects...", len(missed))
+            retry = {title: targets.pop(title) for title in missed}
+            yield from _scan(path, retry, pool, workers * 4, cache)
+            targets.update(retry)
+
+    # Whatever is still unclaimed was not in the dump
+    for names in targets.values():
+        for name in names:
+            yield name, None
@@ -0,0 +1,242 @@
+"""
+Local stand-in for the MediaWiki API, for benchmarks and offline runs.
+
+Serves the subset of the API the scripts use (prop=revisions lookups by
+title or page id with redirects and title normalization, optionally of
+just the lead section, and list=search) from an in-memory set of pages,
+with optional per-request latency and a share of requests answered with
+HTTP 429 and a Retry-After header, so end-to-end runs can be measured
+without touching Wikipedia.
+
+    python -m playerdata.fakewiki --latency 0.05 --throttle 0.1
+
+serves every player in public/data/players.csv (from scripts/) with the
+benchmark fixtures as their articles; point update-player-data.py at it
+with --api-url. --edit-interval makes it edit a random article every so
+often, for trying out the watch command.
+"""
+
+import argparse
+import csv
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES_DIR = Path(__file__).resolve().parent.parent / "benchmarks" / "fixtures"
+DEFAULT_PLAYERS_CSV = Path(__file__).resolve().parent.parent.parent / "public" / "data" / "players.csv"
+
+# Timestamp reported for every revision
+_TIMESTAMP = "2024-01-01T00:00:00Z"
+
+# Start of the first section heading, where the lead section ends
+_SECTION_RE = re.compile(r'^(?==)', re.MULTILINE)
+
+
+def load_fixtures(directory=FIXTURES_DIR):
+    """Recorded articles by fixture name (file name without .wiki)."""
+    return {path.stem: path.read_text(encoding="utf-8") for path in sorted(Path(directory).glob("*.wiki"))}
+
+
+class FakeWiki:
+    """An in-memory wiki served over HTTP on localhost."""
+
+    def __init__(self, latency=0.0, throttle=0.0, retry_after=1, seed=None):
+        """
+        Create an empty wiki.
+
+        Every request waits `latency` seconds, and a `throttle` share of them
+        (0-1) is refused with 429 and `Retry-After: retry_after`.
+        """
+        self.latency = latency
+        self.throttle = throttle
+        self.retry_after = retry_after
+        self.requests = 0
+        self.throttled = 0
+        self._pages = {}  # title -> page
+        self._by_id = {}
+        self._redirects = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+
+    def add_page(self, title, content, revid=None):
+        """Add (or edit) a page; returns its page id."""
+        with self._lock:
+            page = self._pages.get(title)
+            if page is None:
+                page = {"pageid": len(self._by_id) + 1, "title": title, "revid": 0}
+                self._pages[title] = page
+                self._by_id[page["pageid"]] = page
+            page["content"] = content
+            page["revid"] = revid or page["revid"] + 1
+            return page["pageid"]
+
+    def edit_random_page(self):
+        """Append a line to a random article (a new revision); returns its title."""
+        with self._lock:
+            title = self._random.choice(sorted(self._pages))
+            content = self._pages[title]["content"]
+        self.add_page(title, f"{content}\n<!-- edit {time.time():.0f} -->")
+        return title
+
+    def add_redirect(self, title, target):
+        """Make `title` redirect to `target`."""
+        with self._lock:
+            self._redirects[title] = target
+
+    @property
+    def url(self):
+        """API endpoint of the running server."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/w/api.php"
+
+    def start(self, port=0):
+        """Serve on localhost (an ephemeral port by default) from a background thread."""
+        wiki = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                status, body, headers = wiki._respond(self.path)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="fakewiki", daemon=True).start()
+        return self
+
+    def stop(self):
+        """Shut the server down."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start() if self._server is None else self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _respond(self, path):
+        """(status, body, headers) for a request path."""
+        with self._lock:
+            self.requests += 1
+            throttled = self.throttle and self._random.random() < self.throttle
+            if throttled:
+                self.throttled += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if throttled:
+            return 429, b"Too many requests", {"Retry-After": str(self.retry_after)}
+
+        params = {key: values[0] for key, values in parse_qs(urlparse(path).query).items()}
+        with self._lock:
+            data = self._query(params)
+        return 200, json.dumps(data).encode("utf-8"), {"Content-Type": "application/json"}
+
+    def _query(self, params):
+        """Answer an API query (called with the lock held)."""
+        if params.get("action") != "query":
+            return {"error": {"code": "badvalue", "info": "Only action=query is supported"}}
+        if params.get("list") == "search":
+            words = params.get("srsearch", "").lower().split()
+            limit = int(params.get("srlimit", 10))
+            hits = [title for title in self._pages if all(word in title.lower() for word in words)]
+            return {"query": {"search": [{"ns": 0, "title": title} for title in hits[:limit]]}}
+
+        rvprop = params.get("rvprop", "")
+        normalized, redirects, pages = [], [], []
+        if "titles" in params:
+            for requested in params["titles"].split("|"):
+                title = requested.replace("_", " ").strip()
+                title = title[:1].upper() + title[1:]
+                if title != requested:
+                    normalized.append({"from": requested, "to": title})
+                if title in self._redirects:
+                    redirects.append({"from": title, "to": self._redirects[title]})
+                    title = self._redirects[title]
+                page = self._pages.get(title)
+                pages.append(page or {"title": title, "missing": True})
+        else:
+            for pageid in params.get("pageids", "").split("|"):
+                page = self._by_id.get(int(pageid)) if pageid.isdigit() else None
+                pages.append(page or {"pageid": int(pageid) if pageid.isdigit() else 0, "missing": True})
+
+        results = []
+        for page in pages:
+            if page.get("missing"):
+                results.append(dict(page))
+                continue
+            revision = {"revid": page["revid"], "timestamp": _TIMESTAMP}
+            if "content" in rvprop:
+                content = page["content"]
+                if params.get("rvsection") == "0":
+                    content = _SECTION_RE.split(content, 1)[0]
+                revision["slots"] = {"main": {"contentmodel": "wikitext", "content": content}}
+            results.append({"pageid": page["pageid"], "ns": 0, "title": page["title"], "revisions": [revision]})
+        query = {"pages": results}
+        if normalized:
+            query["normalized"] = normalized
+        if redirects:
+            query["redirects"] = redirects
+        return {"batchcomplete": True, "query": query}
+
+
+def populate(wiki, names, fixtures):
+    """
+    Give every player in `names` an article, cycling through `fixtures`.
+
+    Each article is made unique (a category line naming the player), so
+    the page cache cannot share texts or parse results between players.
+    """
+    articles = list(fixtures.values())
+    for i, name in enumerate(names):
+        wiki.add_page(name, f"{articles[i % len(articles)]}\n[[Category:{name}]]\n")
+
+
+def main(argv=None):
+    """Serve the players of a CSV until interrupted."""
+    parser = argparse.ArgumentParser(description="Serve a fake MediaWiki API on localhost.")
+    parser.add_argument('--port', type=int, default=8765, help="port to listen on (default: %(default)s)")
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument('--throttle', type=float, default=0.0, help="share of requests refused with 429 (0-1)")
+    parser.add_argument('--retry-after', type=int, default=1, help="Retry-After sent with 429s (default: %(default)s)")
+    parser.add_argument('--csv', type=Path, default=DEFAULT_PLAYERS_CSV, help="players to serve (default: %(default)s)")
+    parser.add_argument('--edit-interval', type=float, help="edit a random article every this many seconds")
+    args = parser.parse_args(argv)
+
+    with open(args.csv, encoding="utf-8") as f:
+        names = [row["name"] for row in csv.DictReader(f)]
+    wiki = FakeWiki(args.latency, args.throttle, args.retry_after)
+    populate(wiki, names, load_fixtures())
+    wiki.start(args.port)
+    print(f"Serving {len(names)} players at {wiki.url} (Ctrl+C to stop)")
+    try:
+        while True:
+            if args.edit_interval:
+                time.sleep(args.edit_interval)
+                print(f"Edited {wiki.edit_random_page()}")
+            else:
+                threading.Event().wait()
+    except KeyboardInterrupt:
+        wiki.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
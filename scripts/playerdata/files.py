@@ -0,0 +1,35 @@
+"""
+Crash-safe file writes.
+
+Output files are written to a temporary file next to the target, flushed
+to disk and renamed over it, so a crash or a killed job leaves either the
+old file or the new one, never a truncated mix. Unchanged files are not
+rewritten at all, which keeps their modification times (and git) quiet.
+"""
+
+import os
+from pathlib import Path
+
+
+def write_atomic(path, text):
+    """Write `text` to `path` via a temporary file, so readers never see half a file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def write_if_changed(path, text):
+    """Atomically write `text` to `path` unless it already holds exactly that; returns whether it was written."""
+    path = Path(path)
+    try:
+        if path.read_bytes() == text.encode('utf-8'):
+            return False
+    except FileNotFoundError:
+        pass
+    write_atomic(path, text)
+    return True
@@ -0,0 +1,187 @@
+"""
+Trophy counts from the Honours section of a footballer's article.
+
+The section (==Honours==, ==Career honours==, ==Honours and awards==...)
+lists competitions as bullets grouped under club, national team and
+individual headings, either as subheadings (===Individual===) or bold
+lines ('''Individual'''):
+
+    '''Barcelona'''
+    * [[Liga F]]: 2012–13, 2013–14; runner-up: 2018–19
+    '''Individual'''
+    * [[Ballon d'Or Féminin]]: 2021, 2022
+
+Every year or season listed for a competition counts as one trophy, up to
+a runner-up (or similar) marker; a bullet without years counts once.
+Groups headed "Individual" or "Awards" count towards the player's
+individual trophies, and club and senior national team groups towards
+team trophies. Youth and reserve sides (Spain U19, Barcelona B,
+===Youth===...), orders and decorations (state honours, not trophies)
+and records are not counted; a group inside such a heading is not
+either.
+
+Only whole articles have this section: lead sections parse to None.
+"""
+
+import re
+
+# Any heading, with its level (number of '='). Articles are searched for
+# them from a newline rather than with '^', which lets the regex engine skip
+# ahead to candidate lines (several times faster on long articles).
+_ARTICLE_HEADING_RE = re.compile(r'\n(={2,6})[ \t]*([^\n]*?)[ \t]*\1[ \t]*(?=\n|$)')
+_HEADING_RE = re.compile(r'^(={2,6})\s*(.*?)\s*\1\s*$')
+_HONOURS_TITLE_RE = re.compile(r'honou?rs|titles|trophies|achievements', re.IGNORECASE)
+_BOLD_LINE_RE = re.compile(r"^'''(.+?)'''")
+_BULLET_RE = re.compile(r'^(\*+)\s*(.*)')
+
+_INDIVIDUAL_RE = re.compile(r'\b(?:individual|personal|awards?)\b', re.IGNORECASE)
+# Groups that list no senior team trophies: youth and reserve sides (U19,
+# U-17, Under-21, Barcelona B, Bayern Munich II), state orders and
+# decorations, and records
+_NOT_COUNTED_RE = re.compile(
+    r'\b(?:youth|juniors?|academy|reserves?|u-?\d{2}|under-?\s?\d{2}'
+    r'|orders?|decorations?|state honou?rs|records?)\b|\s(?:B|II)$',
+    re.IGNORECASE)
+# Everything from here on in a bullet lists finals or places not won
+_NOT_WON_RE = re.compile(
+    r'runners?[ -]up|second place|third place|fourth place|finalist|silver|bronze', re.IGNORECASE)
+
+_REF_RE = re.compile(r'<ref[^>/]*/>|<ref[^>]*>.*?</ref>', re.DOTALL)
+_COMMENT_RE = re.compile(r'<!--.*?-->', re.DOTALL)
+_TEMPLATE_RE = re.compile(r'{{[^{}]*}}')
+# [[target|display]] -> display, [[target]] -> target
+_LINK_RE = re.compile(r'\[\[(?:[^\]|]*\|)?([^\]|]*)\]\]')
+# A year (2021) or season (2012–13, 2012-2013, 2012/13), counted once each
+_SEASON_RE = re.compile(r'(?<!\d)\d{4}(?:\s*[–—/-]\s*\d{2,4})?(?!\d)')
+
+
+class Honours:
+    """Trophies a player has won, as counted by parse_honours()."""
+
+    __slots__ = ('team_trophies', 'individual_trophies')
+
+    def __init__(self, team_trophies=0, individual_trophies=0):
+        self.team_trophies = team_trophies
+        self.individual_trophies = individual_trophies
+
+    def __repr__(self):
+        return f"Honours(team_trophies={self.team_trophies!r}, individual_trophies={self.individual_trophies!r})"
+
+    def to_dict(self):
+        """JSON-friendly form, for the page cache."""
+        return {'team_trophies': self.team_trophies, 'individual_trophies': self.individual_trophies}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Inverse of to_dict()."""
+        return cls(data['team_trophies'], data['individual_trophies'])
+
+
+def find_honours_section(content):
+    """The body of an article's honours section (without its heading), or None."""
+    headings = list(_ARTICLE_HEADING_RE.finditer(content))
+    for i, heading in enumerate(headings):
+        level = len(heading.group(1))
+        if not _HONOURS_TITLE_RE.search(heading.group(2)):
+            continue
+        end = len(content)
+        for following in headings[i + 1:]:
+            if len(following.group(1)) <= level:
+                end = following.start()
+                break
+        return content[heading.end():end]
+    return None
+
+
+def _clean(text):
+    """Strip refs, comments and templates, and reduce links to their display text."""
+    text = _REF_RE.sub('', text)
+    text = _COMMENT_RE.sub('', text)
+    # Innermost templates first, so nested ones go too
+    while True:
+        stripped = _TEMPLATE_RE.sub('', text)
+        if stripped == text:
+            break
+        text = stripped
+    return _LINK_RE.sub(r'\1', text)
+
+
+def _kind(label):
+    """What a group's heading makes its trophies: 'individual', 'team' or None (not counted)."""
+    if _NOT_COUNTED_RE.search(label):
+        return None
+    if _INDIVIDUAL_RE.search(label):
+        return 'individual'
+    return 'team'
+
+
+def _count(text):
+    """
+    Trophies listed by one bullet: its years or seasons (after the
+    competition name) up to a not-won marker; one when it lists no years.
+    None when it lists only finals or places not won.
+    """
+    won = _NOT_WON_RE.split(text, 1)
+    listed = won[0].split(':', 1)[1] if ':' in won[0] else won[0]
+    seasons = len(_SEASON_RE.findall(listed))
+    if seasons:
+        return seasons
+    if len(won) > 1:
+        return None
+    return 1
+
+
+def parse_honours(content):
+    """
+    Count the trophies listed in an article's honours section.
+
+    Returns an Honours, or None when the article has no honours section
+    (or it lists nothing).
+    """
+    if not content:
+        return None
+    section = find_honours_section(content)
+    if section is None:
+        return None
+
+    honours = Honours()
+    found = False
+    # Kinds of the enclosing subheadings, as (level, kind); bold lines group
+    # the bullets below the current subheading
+    headings = []
+    kind = 'team'
+    bullets = []
+    for line in section.splitlines():
+        line = line.strip()
+        heading = _HEADING_RE.match(line)
+        bold = None if heading else _BOLD_LINE_RE.match(line)
+        if heading or bold:
+            level, label = (len(heading.group(1)), heading.group(2)) if heading else (7, bold.group(1))
+            while headings and headings[-1][0] >= level:
+                headings.pop()
+            kind = _kind(_clean(label))
+            if kind == 'team' and headings:
+                # A club or country inside a youth (or individual) heading
+                kind = headings[-1][1]
+            if heading:
+                headings.append((level, kind))
+            continue
+        bullet = _BULLET_RE.match(line)
+        if bullet and kind is not None:
+            bullets.append((len(bullet.group(1)), _clean(bullet.group(2)).strip(), kind == 'individual'))
+
+    for i, (depth, text, in_individual) in enumerate(bullets):
+        if not text:
+            continue
+        if not _SEASON_RE.search(text) and i + 1 < len(bullets) and bullets[i + 1][0] > depth:
+            # A competition whose wins are listed on the sub-bullets below it
+            continue
+        count = _count(text)
+        if count is None:
+            continue
+        found = True
+        if in_individual:
+            honours.individual_trophies += count
+        else:
+            honours.team_trophies += count
+    return honours if found else None
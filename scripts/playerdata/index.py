@@ -0,0 +1,63 @@
+"""
+Persistent player name -> Wikipedia page index.
+
+Once a player's article has been found, its page id and canonical title
+are kept in a small JSON sidecar next to the scripts (committed along with
+the CSV). Later runs fetch those pages by id directly instead of looking
+the name up again, and the search API is only used when the stored page
+has been deleted or turned into a redirect. Pinning the page id also keeps
+a player from silently drifting to a different article when search results
+change.
+"""
+
+import json
+from pathlib import Path
+
+from .files import write_atomic
+
+DEFAULT_INDEX_PATH = Path(__file__).resolve().parent.parent / "player-index.json"
+
+
+class PlayerIndex:
+    """Player names mapped to {'pageid', 'title'} of their Wikipedia article."""
+
+    def __init__(self, path=DEFAULT_INDEX_PATH, read=True):
+        """
+        Load the index at `path` (a missing file is an empty index).
+
+        With `read=False` stored entries are ignored, so every player is
+        resolved again, but the results are still saved.
+        """
+        self.path = Path(path)
+        self.entries = {}
+        self.changed = False
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        self.read = read
+
+    def get(self, name):
+        """Return the stored {'pageid', 'title'} for a player, or None."""
+        return self.entries.get(name) if self.read else None
+
+    def record(self, name, page):
+        """Remember the page a player resolved to."""
+        entry = {'pageid': int(page['pageid']), 'title': page['title']}
+        if self.entries.get(name) != entry:
+            self.entries[name] = entry
+            self.changed = True
+
+    def prune(self, names):
+        """Drop players that are no longer in `names`."""
+        names = set(names)
+        for name in [name for name in self.entries if name not in names]:
+            del self.entries[name]
+            self.changed = True
+
+    def save(self):
+        """Write the index back if it changed (atomically, sorted for stable diffs)."""
+        if not self.changed:
+            return False
+        write_atomic(self.path, json.dumps(self.entries, indent=2, sort_keys=True, ensure_ascii=False) + '\n')
+        self.changed = False
+        return True
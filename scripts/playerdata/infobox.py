@@ -0,0 +1,416 @@
+"""
+Football biography infobox parsing.
+
+The article is scanned once for `{{Infobox` openings, the closing braces of
+the chosen infobox are found by walking brace runs, and the infobox body is
+tokenized in a single pass into its parameters. All stat and club
+extractors read from that parameter list instead of rescanning the text.
+
+parse_article() adds the trophy counts of the article's honours section
+(see honours.py), so one parse of a page serves every target dataset.
+"""
+
+import hashlib
+import re
+from pathlib import Path
+
+from .honours import Honours, parse_honours
+
+# Cached parse results are only reused when produced by this exact parser
+# (this module and the honours parser)
+PARSER_VERSION = hashlib.sha1(b''.join(
+    (Path(__file__).parent / name).read_bytes() for name in ('infobox.py', 'honours.py')
+)).hexdigest()[:12]
+
+_LINK_RE = re.compile(r'\[\[([^\]]+)\]\]')
+# Target of a wiki link: up to the display text or section anchor
+_LINK_TARGET_RE = re.compile(r'\[\[\s*([^\]|#]+)')
+_LINK_DISPLAY_RE = re.compile(r'\|[^\]]+')
+_REF_RE = re.compile(r'<ref[^>]*>.*?</ref>', re.DOTALL)
+_TEMPLATE_RE = re.compile(r'{{.*?}}', re.DOTALL)
+_PARENS_RE = re.compile(r'\([^)]*\)')
+_NUMBER_RE = re.compile(r'(\d{1,3}(?:,\d{3})*(?:\.\d+)?)')
+
+# Every infobox opening, with the rest of its line (used to rank the kind of infobox)
+_INFOBOX_RE = re.compile(r'\{\{Infobox(?=([^\n]*))', re.IGNORECASE)
+
+# Infobox kinds in order of preference; the first kind found anywhere in the
+# article wins, earliest occurrence first
+_INFOBOX_KINDS = [
+    re.compile(r' football biography', re.IGNORECASE),
+    re.compile(r' footballer', re.IGNORECASE),
+    re.compile(r'.*football.*biography', re.IGNORECASE),
+    re.compile(r'.*association.*football.*player', re.IGNORECASE),
+    re.compile(r'.*footballer', re.IGNORECASE),
+]
+
+# Cheap pre-filter: every infobox kind above mentions "football" on its opening line
+_FOOTBALL_INFOBOX_RE = re.compile(r'\{\{Infobox[^\n]*football', re.IGNORECASE)
+
+_BRACE_RUN_RE = re.compile(r'\{+|\}+')
+
+# One parameter assignment: line-start marker, optional pipe, name, '=', and
+# the rest of the line. The value is captured in a lookahead so inline
+# parameters that follow on the same line are still found.
+_PARAM_RE = re.compile(r'(^[ \t]*)?(\|?)([ \t]*)(\w+)[ \t]*=(?=[ \t]*([^\n]*))', re.MULTILINE)
+# A stat value: everything up to the next pipe or end of line
+_INLINE_VALUE_RE = re.compile(r'\s*([^\|\n]+)')
+
+# Numbered club/international stats. Any parameter ending in goalsN or capsN
+# counts towards the club total; nationalgoalsN/nationalcapsN also towards
+# the international one.
+_NUMBERED_KEY = re.compile(r'(national)?(goals|caps)\d+$')
+_YEARS_KEY = re.compile(r'years(\d+)$')
+_CLUBS_KEY = re.compile(r'clubs(\d+)$')
+
+# Single-value fallbacks, tried in order
+_CAREER_GOALS_KEYS = ['goals', 'totalgoals', 'careergoals']
+_CLUB_GOALS_KEYS = ['clubgoals']
+_CAREER_APPS_KEYS = ['caps', 'appearances', 'totalcaps', 'totalappearances']
+_CLUB_APPS_KEYS = ['clubcaps', 'clubappearances']
+_SINGLE_KEYS = {
+    variant
+    for key in _CAREER_GOALS_KEYS + _CLUB_GOALS_KEYS + _CAREER_APPS_KEYS + _CLUB_APPS_KEYS
+    for variant in (key, key[:-1])
+}
+
+# Parse years (could be 2010–2014, 2010–, 2010-present, 2010-2014, etc.)
+# Handle en dash, em dash, and regular hyphen
+_YEAR_PATTERNS = [
+    re.compile(r'(\d{4})\s*[–—]\s*(\d{4}|present|Present)?'),
+    re.compile(r'(\d{4})\s*[–—]'),  # For formats like "2012–" (present)
+    re.compile(r'(\d{4})\s*-\s*(\d{4}|present|Present)'),
+    re.compile(r'(\d{4})\s*to\s*(\d{4}|present|Present)'),
+]
+_END_YEAR_RE = re.compile(r'(\d{4})$')
+_ANY_YEAR_RE = re.compile(r'\d{4}')
+
+# Totals a PlayerStats can carry, named after their CSV columns
+STAT_FIELDS = (
+    'career_goals', 'club_goals', 'international_goals',
+    'career_appearances', 'club_appearances', 'international_appearances',
+)
+
+
+class ClubSpell:
+    """
+    One spell at a club, with start and end years ('present' if ongoing).
+
+    `name` is the club as displayed in the infobox and `link` the article
+    it links to (None for unlinked clubs).
+    """
+
+    __slots__ = ('name', 'start', 'end', 'link')
+
+    def __init__(self, name, start, end, link=None):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.link = link
+
+    def __repr__(self):
+        return f"ClubSpell({self.name!r}, {self.start!r}, {self.end!r}, {self.link!r})"
+
+
+class PlayerStats:
+    """
+    What parse_article() extracts: club spells and goal/appearance totals
+    from the infobox, and `honours` (an Honours, or None when the text has
+    no honours section).
+    """
+
+    __slots__ = ('clubs', 'honours') + STAT_FIELDS
+
+    def __init__(self, clubs=(), honours=None, **totals):
+        self.clubs = tuple(clubs)
+        self.honours = honours
+        for field in STAT_FIELDS:
+            setattr(self, field, totals.get(field))
+
+    def __repr__(self):
+        totals = ''.join(f", {field}={getattr(self, field)!r}" for field in STAT_FIELDS
+                         if getattr(self, field) is not None)
+        honours = f", honours={self.honours!r}" if self.honours is not None else ''
+        return f"PlayerStats({list(self.clubs)!r}{totals}{honours})"
+
+    def totals(self):
+        """The totals that were found, as {field: number}."""
+        return {field: getattr(self, field) for field in STAT_FIELDS
+                if getattr(self, field) is not None}
+
+    def to_dict(self):
+        """JSON-friendly form, for the page cache."""
+        data = {'clubs': [[club.name, club.start, club.end, club.link] for club in self.clubs], **self.totals()}
+        if self.honours is not None:
+            data['honours'] = self.honours.to_dict()
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """Inverse of to_dict()."""
+        honours = Honours.from_dict(data['honours']) if data.get('honours') else None
+        return cls((ClubSpell(*club) for club in data['clubs']), honours,
+                   **{field: data[field] for field in STAT_FIELDS if field in data})
+
+
+def clean_wiki_text(text):
+    """Clean Wikipedia markup from text."""
+    if not text:
+        return None
+    # Remove wiki links [[text]] or [[text|display]]
+    text = _LINK_RE.sub(r'\1', text)
+    text = _LINK_DISPLAY_RE.sub('', text)
+    # Remove refs
+    text = _REF_RE.sub('', text)
+    # Remove other markup
+    text = _TEMPLATE_RE.sub('', text)
+    text = text.strip().rstrip('}}').strip()
+    return text
+
+
+def wiki_link_target(text):
+    """Target of the first wiki link in `text` ([[target|display]]), or None."""
+    if not text:
+        return None
+    match = _LINK_TARGET_RE.search(text)
+    if match:
+        return match.group(1).strip() or None
+    return None
+
+
+def extract_number(text):
+    """Extract first number from text, handling commas and parentheses."""
+    if not text:
+        return None
+    # Remove everything in parentheses (like "(3 goals)")
+    text = _PARENS_RE.sub('', text)
+    # Find first number (may have commas like 1,234)
+    match = _NUMBER_RE.search(text.replace(',', ''))
+    if match:
+        try:
+            return int(float(match.group(1)))
+        except ValueError:
+            return None
+    return None
+
+
+def has_football_infobox(content):
+    """Whether an article may contain an infobox parse_infobox() understands."""
+    return bool(content and _FOOTBALL_INFOBOX_RE.search(content))
+
+
+def find_infobox(content):
+    """
+    Locate the football infobox in an article.
+
+    Returns the infobox source (from `{{Infobox` to its matching closing
+    braces) or None.
+    """
+    best = None
+    for match in _INFOBOX_RE.finditer(content):
+        rest = match.group(1)
+        for rank, kind in enumerate(_INFOBOX_KINDS):
+            if best is not None and rank >= best[0]:
+                break
+            if kind.match(rest):
+                best = (rank, match.start())
+                break
+        if best is not None and best[0] == 0:
+            break
+    if best is None:
+        return None
+
+    start = best[1]
+    depth = 0
+    for run in _BRACE_RUN_RE.finditer(content, start):
+        length = run.end() - run.start()
+        if content[run.start()] == '{':
+            depth += length
+        elif length >= depth:
+            return content[start:run.start() + depth]
+        else:
+            depth -= length
+    return None
+
+
+def tokenize_infobox(infobox):
+    """
+    Split an infobox into its parameters in a single pass.
+
+    Returns a list of (name, value, inline, line_start, tight, swallowed)
+    tuples in source order. `value` is the rest of the line after '='
+    (stripped), so inline parameters that follow on the same line are part
+    of it; `inline` is the value up to the next pipe, or None when it is
+    empty. `line_start` is True when the parameter begins its line and
+    `tight` when the pipe is directly followed by the name. An empty value
+    takes its inline value from the next line, like the old per-stat
+    regexes did; `swallowed` is True for a parameter on that line that the
+    previous parameter's inline value ran over.
+    """
+    params = []
+    inline_end = 0
+    for match in _PARAM_RE.finditer(infobox):
+        indent, pipe, space, name, value = match.groups()
+        inline = _INLINE_VALUE_RE.match(infobox, match.end())
+        params.append((
+            name,
+            value.strip(),
+            inline.group(1) if inline else None,
+            indent is not None,
+            pipe == '|' and not space,
+            match.start(4) < inline_end,
+        ))
+        inline_end = inline.end() if inline else 0
+    return params
+
+
+def _value_number(inline):
+    """Numeric value of a parameter's inline value."""
+    return extract_number(clean_wiki_text(inline))
+
+
+def _first_number(singles, names):
+    """Number from the first of `names` present (in order of `names`), or None."""
+    for wanted in names:
+        # 'goals' also matches a singular 'goal' parameter, whichever comes first
+        found = [singles[key] for key in (wanted, wanted[:-1]) if key in singles]
+        if found:
+            number = _value_number(min(found)[1])
+            if number is not None:
+                return number
+    return None
+
+
+def _parse_years(years):
+    """Parse a years value into (start, end) strings, or None."""
+    for year_pattern in _YEAR_PATTERNS:
+        year_match = year_pattern.match(years)
+        if year_match:
+            start_year = year_match.group(1)
+            end_year = year_match.group(2) if len(year_match.groups()) > 1 and year_match.group(2) else None
+
+            # If no end year in match, check if years string ends with dash
+            if end_year is None:
+                if years.endswith('–') or years.endswith('—') or years.endswith('-'):
+                    end_year = 'present'
+                else:
+                    # Try to extract end year from full string
+                    end_match = _END_YEAR_RE.search(years)
+                    end_year = end_match.group(1) if end_match else 'present'
+
+            end_year = end_year.lower()
+            if end_year == 'present' or end_year.isdigit():
+                return start_year, end_year
+            return None
+
+    # Fallback: try to extract any 4-digit years
+    year_matches = _ANY_YEAR_RE.findall(years)
+    if year_matches:
+        start_year = year_matches[0]
+        end_year = year_matches[1] if len(year_matches) > 1 else 'present'
+        return start_year, end_year
+    return None
+
+
+def _extract_clubs(club_dict):
+    """Club spells from the collected yearsN/clubsN values, in numeric order."""
+    clubs = []
+    for num, data in sorted(club_dict.items(), key=lambda x: int(x[0])):
+        if 'years' not in data or 'club' not in data:
+            continue
+        club_name = clean_wiki_text(data['club'])
+        if not club_name:
+            continue
+        years = _parse_years(data['years'])
+        if years:
+            clubs.append(ClubSpell(club_name, years[0], years[1], wiki_link_target(data['club'])))
+    return clubs
+
+
+def parse_infobox(content):
+    """
+    Parse Wikipedia infobox to extract club information, goals, and appearances.
+
+    Returns a PlayerStats, or None when no football infobox (or nothing
+    useful in it) was found.
+    """
+    if not content:
+        return None
+
+    infobox = find_infobox(content)
+    if infobox is None:
+        return None
+
+    # Walk the parameters once, collecting everything the extractors need
+    totals = {('goals', False): 0, ('goals', True): 0, ('caps', False): 0, ('caps', True): 0}
+    singles = {}
+    club_dict = {}
+    previous = None  # the previous parameter's numbered stat match
+    for index, (name, value, inline, line_start, tight, swallowed) in enumerate(tokenize_infobox(infobox)):
+        numbered = _NUMBERED_KEY.search(name.lower())
+        # Parameters without an inline value never count as stats
+        if inline is not None:
+            key = name.lower()
+            if numbered:
+                number = _value_number(inline)
+                # A parameter whose line a stat of the same kind ran over was
+                # consumed by that stat's match (for club totals, any
+                # goalsN/capsN; for international ones, only national ones)
+                same = swallowed and previous is not None and previous.group(2) == numbered.group(2)
+                if number is not None:
+                    if not same:
+                        totals[(numbered.group(2), False)] += number
+                    if numbered.group(1) and not (same and previous.group(1)):
+                        totals[(numbered.group(2), True)] += number
+            elif tight and key in _SINGLE_KEYS and key not in singles:
+                singles[key] = (index, inline)
+        previous = numbered
+
+        # Club spells only come from yearsN/clubsN lines (not youth entries)
+        if line_start and value:
+            years_match = _YEARS_KEY.match(name)
+            if years_match:
+                if 'youthyears' not in value:
+                    club_dict.setdefault(years_match.group(1), {})['years'] = value
+            else:
+                clubs_match = _CLUBS_KEY.match(name)
+                if clubs_match and 'youthclubs' not in value:
+                    club_dict.setdefault(clubs_match.group(1), {})['club'] = value
+
+    stats = PlayerStats(_extract_clubs(club_dict))
+    for stat, field, career_keys, club_keys in (
+        ('goals', 'goals', _CAREER_GOALS_KEYS, _CLUB_GOALS_KEYS),
+        ('caps', 'appearances', _CAREER_APPS_KEYS, _CLUB_APPS_KEYS),
+    ):
+        club_total = totals[(stat, False)]
+        intl_total = totals[(stat, True)]
+        career = club_total + intl_total if club_total > 0 or intl_total > 0 else None
+        club = club_total if club_total > 0 else None
+
+        # Fallbacks: a single |goals= / |caps= style total, and an explicit club total
+        if career is None:
+            career = _first_number(singles, career_keys)
+        if club is None:
+            club = _first_number(singles, club_keys)
+
+        setattr(stats, f'career_{field}', career)
+        setattr(stats, f'club_{field}', club)
+        setattr(stats, f'international_{field}', intl_total if intl_total > 0 else None)
+
+    # Only return if we found at least clubs, goals, or appearances
+    if stats.clubs or stats.totals():
+        return stats
+    return None
+
+
+def parse_article(content):
+    """
+    Parse a player's article: its infobox (see parse_infobox()), with the
+    trophy counts of its honours section attached as `honours`.
+
+    Returns None when the infobox gives nothing, whatever the honours.
+    """
+    stats = parse_infobox(content)
+    if stats is not None:
+        stats.honours = parse_honours(content)
+    return stats
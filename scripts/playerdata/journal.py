@@ -0,0 +1,140 @@
+"""
+Checkpoint journal for update runs, so an interrupted run can resume.
+
+As players come out of the pipeline, their outcome (parse result, the page
+they resolved to, or why they failed) is buffered and appended to a JSON
+lines file every `every` players, flushed to disk. A run that is killed
+or times out leaves the journal behind; the next run with the same CSV
+and parser replays the journaled players instead of fetching them again
+and only sends the rest through the pipeline. The journal is removed once
+the run's output files have been written.
+
+The first line holds a fingerprint of the inputs (the target CSVs'
+content and the parser version); a journal with another fingerprint is stale and
+started over. A torn last line, from a crash mid-write, is ignored.
+Players whose request failed (see metrics.TRANSIENT_FAILURES) are
+journaled with the reason, but fetched again on resume.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from .cache import DEFAULT_CACHE_DIR
+from .infobox import PARSER_VERSION, PlayerStats
+from .metrics import TRANSIENT_FAILURES
+
+DEFAULT_JOURNAL_PATH = DEFAULT_CACHE_DIR / "update-journal.jsonl"
+DEFAULT_CHECKPOINT_EVERY = 50
+
+
+def default_journal_path(shard=None):
+    """The journal of a run, of shard (i, n) if given, so parallel shards keep separate journals."""
+    if shard is None:
+        return DEFAULT_JOURNAL_PATH
+    return DEFAULT_JOURNAL_PATH.with_name(f"update-journal-{shard[0]}-of-{shard[1]}.jsonl")
+
+
+def fingerprint(csv_paths, *extra):
+    """Fingerprint of a run's inputs: the CSVs' bytes, the parser version and `extra` strings."""
+    digest = hashlib.sha1()
+    for path in csv_paths:
+        digest.update(hashlib.sha1(Path(path).read_bytes()).digest())
+    for part in (PARSER_VERSION, *extra):
+        digest.update(b'\0' + str(part).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class Journal:
+    """Append-only record of the players a run has finished."""
+
+    def __init__(self, path, fingerprint, every=DEFAULT_CHECKPOINT_EVERY, resume=True):
+        """
+        Open the journal at `path` for a run whose inputs have `fingerprint`.
+
+        Entries left by an interrupted run with the same fingerprint are
+        loaded into `entries` unless `resume` is False.
+        """
+        self.path = Path(path)
+        self.fingerprint = fingerprint
+        self.every = max(1, every)
+        self.entries = {}  # player name -> {'parsed', 'page', 'failure'}
+        self._pending = []
+        self._started = False
+        if resume:
+            self._load()
+
+    def _load(self):
+        try:
+            data = self.path.read_bytes()
+        except FileNotFoundError:
+            return
+        lines = data.splitlines(keepends=True)
+        try:
+            header = json.loads(lines[0])
+        except (IndexError, ValueError):
+            return
+        if header.get('fingerprint') != self.fingerprint:
+            return
+        good = len(lines[0])
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break
+            if not line.endswith(b'\n'):
+                break
+            good += len(line)
+            if entry['failure'] in TRANSIENT_FAILURES:
+                continue
+            parsed = entry['parsed']
+            self.entries[entry['player']] = {
+                'parsed': PlayerStats.from_dict(parsed) if parsed is not None else None,
+                'page': entry['page'],
+                'failure': entry['failure'],
+            }
+        # Drop a torn last line, then keep appending
+        if good < len(data):
+            with open(self.path, 'r+b') as f:
+                f.truncate(good)
+        self._started = True
+
+    def record(self, player, parsed, page=None, failure=None):
+        """
+        Note that `player` is done; checkpoints every `every` players.
+
+        `page` is the {'pageid', 'title'} the player resolved to, if any.
+        """
+        self.entries[player] = {'parsed': parsed, 'page': page, 'failure': failure}
+        self._pending.append(json.dumps({
+            'player': player,
+            'parsed': parsed.to_dict() if parsed is not None else None,
+            'page': page,
+            'failure': failure,
+        }, ensure_ascii=False))
+        if len(self._pending) >= self.every:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Append the players recorded since the last checkpoint and flush them to disk."""
+        if not self._pending and self._started:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a' if self._started else 'w', encoding='utf-8') as f:
+            if not self._started:
+                f.write(json.dumps({'fingerprint': self.fingerprint}) + '\n')
+            f.writelines(line + '\n' for line in self._pending)
+            f.flush()
+            os.fsync(f.fileno())
+        self._started = True
+        self._pending = []
+
+    def remove(self):
+        """Delete the journal after a completed run."""
+        self._pending = []
+        self._started = False
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
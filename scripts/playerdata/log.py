@@ -0,0 +1,56 @@
+"""
+Logging setup for the player data scripts.
+
+Records are handed to a queue and written by a listener thread, so the
+update loop never waits on the terminal (or a slow CI log pipe). The text
+format prints just the message, like the scripts always have; the JSON
+format writes one object per line with the record's structured fields
+(player, stage, reason, ...) for log processors.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record, with `extra` fields as keys."""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'message': record.getMessage().strip(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure(level='INFO', fmt='text', stream=None):
+    """
+    Send all logging to `stream` (default: stdout) through a background thread.
+
+    `fmt` is 'text' or 'json'. The listener is flushed and stopped at exit.
+    """
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(JSONFormatter() if fmt == 'json' else logging.Formatter('%(message)s'))
+
+    records = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(records, handler, respect_handler_level=True)
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(records)]
+    root.setLevel(level)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
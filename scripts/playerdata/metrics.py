@@ -0,0 +1,211 @@
+"""
+Run telemetry: per-stage timing histograms, counters and failure reasons.
+
+Stages record how long each item took (a batch for resolve/fetch, a page
+for parse, a player for update, a request for the HTTP client...) into a
+histogram with fixed, Prometheus-style buckets, so recording stays cheap
+and thread-safe however many items a run handles. At the end of a run the
+figures are written as a JSON report and/or a Prometheus textfile (for
+node_exporter's textfile collector).
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+from .files import write_atomic
+
+# Upper bounds (seconds) of the histogram buckets, from a fast cache lookup
+# to a request waiting out a long Retry-After
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+PROMETHEUS_PREFIX = "player_data"
+
+# Failure reasons that say nothing about the player's article (the request
+# for it failed), so a resumed run fetches the player again
+TRANSIENT_FAILURES = frozenset({'fetch_error'})
+
+
+class Histogram:
+    """Counts of observations per bucket, plus their sum and maximum."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Estimate a quantile by interpolating within its bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets + (self.max,), self.counts):
+            if count and seen + count >= rank:
+                upper = min(bound, self.max)
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+            lower = bound
+        return self.max
+
+    def cumulative(self):
+        """(upper bound, observations <= bound) pairs, ending with +Inf."""
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def summary(self):
+        """JSON-friendly summary."""
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else None,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+            'max': self.max if self.count else None,
+            'buckets': {('+Inf' if bound == float('inf') else f'{bound:g}'): total
+                        for bound, total in self.cumulative()},
+        }
+
+
+class Metrics:
+    """Thread-safe registry of stage histograms, counters and player failures."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.stages = {}
+        self.counters = {}
+        self.failures = {}  # player name -> reason
+
+    def reset(self):
+        """Start over, e.g. for the next cycle of a long-running watcher."""
+        with self._lock:
+            self.started = time.time()
+            self.stages = {}
+            self.counters = {}
+            self.failures = {}
+
+    def observe(self, stage, seconds):
+        """Record that one item of `stage` took `seconds`."""
+        with self._lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        """Time the enclosed block as one item of `stage`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def count(self, name, value=1):
+        """Add `value` to a counter."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def fail(self, player, reason):
+        """Record why a player could not be updated."""
+        with self._lock:
+            self.failures[player] = reason
+
+    def failure_counts(self):
+        """Number of failed players per reason."""
+        counts = {}
+        for reason in self.failures.values():
+            counts[reason] = counts.get(reason, 0) + 1
+        return dict(sorted(counts.items()))
+
+    def report(self, **extra):
+        """
+        The run report: stage summaries, counters and failures, plus the
+        `extra` sections the caller adds (requests, cache, ...).
+        """
+        finished = time.time()
+        with self._lock:
+            return {
+                'started': _isoformat(self.started),
+                'finished': _isoformat(finished),
+                'duration_seconds': finished - self.started,
+                **extra,
+                'counters': dict(sorted(self.counters.items())),
+                'stages': {stage: histogram.summary() for stage, histogram in sorted(self.stages.items())},
+                'failures': {
+                    'by_reason': self.failure_counts(),
+                    'players': dict(sorted(self.failures.items())),
+                },
+            }
+
+    def prometheus(self, gauges=None):
+        """
+        Render everything in the Prometheus text exposition format.
+
+        `gauges` adds {name: value} (or {name: {label value: value}}) gauges
+        such as request totals read from other modules.
+        """
+        lines = []
+        name = f"{PROMETHEUS_PREFIX}_stage_seconds"
+        lines += [f"# HELP {name} Time per item spent in each stage of the last update run.",
+                  f"# TYPE {name} histogram"]
+        with self._lock:
+            for stage, histogram in sorted(self.stages.items()):
+                for bound, total in histogram.cumulative():
+                    le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{le}"}} {total}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.sum:.6f}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+            counters = dict(self.counters)
+
+        for counter, value in sorted(counters.items()):
+            lines += [f"# TYPE {PROMETHEUS_PREFIX}_{counter} gauge", f"{PROMETHEUS_PREFIX}_{counter} {value}"]
+
+        name = f"{PROMETHEUS_PREFIX}_failed_players"
+        lines += [f"# HELP {name} Players the last run could not update, by reason.", f"# TYPE {name} gauge"]
+        for reason, value in self.failure_counts().items():
+            lines.append(f'{name}{{reason="{reason}"}} {value}')
+
+        for gauge, value in sorted((gauges or {}).items()):
+            lines.append(f"# TYPE {PROMETHEUS_PREFIX}_{gauge} gauge")
+            if isinstance(value, dict):
+                label, values = value['label'], value['values']
+                for label_value, number in sorted(values.items()):
+                    lines.append(f'{PROMETHEUS_PREFIX}_{gauge}{{{label}="{label_value}"}} {number}')
+            elif value is not None:
+                lines.append(f"{PROMETHEUS_PREFIX}_{gauge} {value}")
+        return '\n'.join(lines) + '\n'
+
+
+def _isoformat(timestamp):
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(timestamp))
+
+
+def write_report(path, report):
+    """Save a run report as JSON."""
+    write_atomic(path, json.dumps(report, indent=2, ensure_ascii=False) + '\n')
+
+
+# Shared by every module of a run, like client.stats
+metrics = Metrics()
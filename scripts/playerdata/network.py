@@ -0,0 +1,108 @@
+"""
+Precomputed player connection graph for the network visualization.
+
+Two players are connected through a club when they had overlapping spells
+there. Instead of comparing every pair of players (and every pair of their
+clubs), spells are grouped by club and each club is swept once in order of
+start year, keeping the spells still active in a heap ordered by end year:
+every spell is only paired with the spells it actually overlaps, so the
+build is output-sensitive and takes well under a second for 10k players.
+Both the graph and the roster refer to spells by their index in the
+dataset's spell table rather than repeating players, clubs and years.
+
+For the year filter, there is also a roster index: for every year,
+which players were at which club, stored as the changes from the previous
+year (players joining and leaving each club), so the frontend can slice the
+network by year with lookups instead of rechecking every overlap.
+
+National team connections are not stored: they form one clique per team,
+which the frontend gets from grouping players by national team.
+"""
+
+import heapq
+from datetime import date
+
+
+def build_edges(spells, current_year=None):
+    """
+    Connect players with overlapping spells at the same club.
+
+    `spells` is the spell table as a list of (player, club, start, end)
+    rows, with players and clubs given by id; `end` is None for current
+    spells, which like in the frontend run until `current_year` (default:
+    this year), and spells without a start year, or ending before they
+    start, are ignored. Returns the sorted (i, j) pairs of spell indexes,
+    i < j, of two players' spells at the same club that share at least one
+    year: the players, the club and the years both were there all follow
+    from the spell table.
+    """
+    current_year = current_year or date.today().year
+    by_club = {}
+    for index, (player, club, start, end) in enumerate(spells):
+        end = current_year if end is None else end
+        if start is not None and start <= end:
+            by_club.setdefault(club, []).append((start, end, player, index))
+
+    pairs = []
+    for club_spells in by_club.values():
+        club_spells.sort()
+        active = []  # (end, start, player, index) of spells that started earlier
+        for start, end, player, index in club_spells:
+            while active and active[0][0] < start:
+                heapq.heappop(active)
+            for _, _, other, other_index in active:
+                if other == player:
+                    continue
+                pairs.append((other_index, index) if other_index < index else (index, other_index))
+            heapq.heappush(active, (end, start, player, index))
+
+    pairs.sort()
+    return pairs
+
+
+def build_roster(spells, current_year=None):
+    """
+    Index which players were at which club in each year, delta-encoded.
+
+    `spells` is as for build_edges(). Current spells run until
+    `current_year` (default: this year), which is also the last year
+    indexed. A player's overlapping or back-to-back spells at a club are
+    merged into one stretch, identified by the index of its first spell
+    (whose row gives the player and the club). Returns {'from': first_year,
+    'deltas': [...]} where deltas[i] is the [joined, left] pair of sorted
+    stretch lists from year from + i - 1 to year from + i; the first entry
+    holds the whole roster of the first year.
+    """
+    current_year = current_year or date.today().year
+    intervals = {}
+    for index, (player, club, start, end) in enumerate(spells):
+        end = current_year if end is None else min(end, current_year)
+        if start is not None and start <= end:
+            intervals.setdefault((club, player), []).append((start, end, index))
+    if not intervals:
+        return {'from': current_year, 'deltas': []}
+
+    # Record a join at the start of every merged stretch and a leave the
+    # year after it ends
+    events = {}
+    for spans in intervals.values():
+        spans.sort()
+        start, end, first = spans[0]
+        for next_start, next_end, index in spans[1:] + [(None, None, None)]:
+            if next_start is not None and next_start <= end + 1:
+                end = max(end, next_end)
+                first = min(first, index)
+                continue
+            events.setdefault(start, ([], []))[0].append(first)
+            if end < current_year:
+                events.setdefault(end + 1, ([], []))[1].append(first)
+            start, end, first = next_start, next_end, index
+
+    first_year = min(events)
+    return {
+        'from': first_year,
+        'deltas': [
+            [sorted(joined), sorted(left)]
+            for joined, left in (events.get(year, ([], [])) for year in range(first_year, current_year + 1))
+        ],
+    }
@@ -0,0 +1,302 @@
+"""
+Staged pipeline for player pages: resolve -> fetch -> parse -> merge.
+
+Each stage runs on its own workers and hands its output to the next stage
+through a bounded queue, so network wait and parsing overlap instead of
+adding up:
+
+- resolve (threads): batched lookups (revision ids only) by the page ids
+  pinned in the player index, then by title, with the search API as
+  fallback for names that are not page titles;
+- fetch (threads): wikitext for the resolved pages, from the page cache or
+  the API, and a search fallback for titles that turn out not to be
+  footballer articles;
+- parse (processes): article parsing on a ProcessPoolExecutor, skipped for
+  pages whose cached parse result matches the current parser;
+- merge: the caller, consuming (player_name, page) pairs.
+
+When a downstream stage falls behind, puts on the full queue block the
+stage feeding it, and parsing only admits as many pages as the merge side
+has released, so the amount of wikitext held in memory stays bounded
+however far the fetchers could run ahead.
+
+When the caller stops consuming early (an error, an interrupt, or closing
+the generator), the stages skip the work still queued, pending parses are
+cancelled, and the generator only returns once every thread and parse
+callback has finished, so the caller can close the cache afterwards.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+from .client import DEFAULT_CONCURRENCY
+from .infobox import PARSER_VERSION, parse_article
+from .metrics import metrics
+from .wikipedia import (
+    chunked,
+    fetch_contents,
+    fetch_pages,
+    fetch_pages_by_id,
+    fetch_pages_by_title,
+    looks_like_player_page,
+    search_wikipedia_player,
+)
+
+# Batches waiting to be fetched, and fetched pages waiting to be parsed
+DEFAULT_QUEUE_SIZE = 16
+
+_DONE = object()
+
+log = logging.getLogger(__name__)
+
+
+def parse_worker(content):
+    """
+    Process pool worker: parse one article (infobox and honours).
+
+    Returns (PlayerStats or None, seconds spent parsing), the time measured
+    in the worker so it excludes the wait for a free process.
+    """
+    start = time.perf_counter()
+    data = parse_article(content)
+    return data, time.perf_counter() - start
+
+
+def _start_stage(name, count, work, inbox, outbox, stop):
+    """
+    Run `work(item, outbox)` for every item of `inbox` on `count` threads.
+
+    The stage ends when it reads _DONE from its inbox; once all its threads
+    have finished, _DONE is passed on to `outbox`. Items read once `stop`
+    is set are dropped.
+    """
+    def run():
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                # Let the sibling workers see it too
+                inbox.put(_DONE)
+                return
+            if not stop.is_set():
+                work(item, outbox)
+
+    threads = [threading.Thread(target=run, name=f"{name}-{i}", daemon=True) for i in range(count)]
+    for thread in threads:
+        thread.start()
+
+    def close():
+        for thread in threads:
+            thread.join()
+        outbox.put(_DONE)
+
+    threading.Thread(target=close, name=f"{name}-close", daemon=True).start()
+
+
+def _resolve(batch, outbox, search_map, index):
+    """Resolve stage: player names -> page revisions (no content yet)."""
+    start = time.perf_counter()
+    pages = {}
+    indexed = {name: index.get(name) for name in batch} if index is not None else {}
+    indexed = {name: entry for name, entry in indexed.items() if entry}
+    if indexed:
+        # Pinned pages are looked up by id; a deleted page or one that has
+        # become a redirect comes back as None and is resolved again below
+        try:
+            by_id = fetch_pages_by_id([entry['pageid'] for entry in indexed.values()], content=False)
+        except Exception as e:
+            log.warning("Error resolving indexed pages for batch starting with %s: %s", batch[0], e)
+            by_id = {}
+        for name, entry in indexed.items():
+            pages[name] = by_id.get(str(entry['pageid']))
+
+    unresolved = [name for name in batch if pages.get(name) is None]
+    failed = []
+    if unresolved:
+        try:
+            pages.update(fetch_pages_by_title(unresolved, content=False))
+        except Exception as e:
+            log.warning("Error resolving batch starting with %s: %s", unresolved[0], e)
+            failed = unresolved
+
+    missing = [name for name in batch if pages.get(name) is None]
+    searched = {}
+    for name, title in zip(missing, search_map(search_wikipedia_player, missing)):
+        if title:
+            searched[name] = title
+
+    if searched:
+        try:
+            hits = fetch_pages_by_title(sorted(set(searched.values())), content=False)
+        except Exception as e:
+            log.warning("Error resolving search results: %s", e)
+            hits = {}
+        for name, title in searched.items():
+            pages[name] = hits.get(title)
+
+    for name in failed:
+        if pages.get(name) is None:
+            metrics.fail(name, 'fetch_error')
+    metrics.observe('resolve', time.perf_counter() - start)
+    outbox.put([(name, pages.get(name), name in searched) for name in batch])
+
+
+def _fetch(resolved, outbox, search_map, cache, full_pages):
+    """Fetch stage: page revisions -> pages with wikitext (whole articles for `full_pages`)."""
+    contents = {}
+    failed = set()
+    try:
+        with metrics.timer('fetch'):
+            contents.update(fetch_contents(
+                [page for name, page, _ in resolved if page and name not in full_pages], cache))
+            # Last, so a page some player needs whole is not left at its lead
+            contents.update(fetch_contents(
+                [page for name, page, _ in resolved if page and name in full_pages], cache, lead=False))
+    except Exception as e:
+        log.warning("Error fetching Wikipedia pages for batch: %s", e)
+        contents = {}
+        failed = {name for name, page, _ in resolved if page}
+
+    fallback = {}
+    for name, page, searched in resolved:
+        page = contents.get(str(page['pageid'])) if page else None
+        if name in failed:
+            metrics.fail(name, 'fetch_error')
+        if page is not None and not searched and not looks_like_player_page(page):
+            # The title exists but is not a footballer article (e.g. a
+            # disambiguation page): try the search API instead
+            fallback[name] = page
+            continue
+        outbox.put((name, page))
+
+    if not fallback:
+        return
+
+    names = list(fallback)
+    searched = {name: title for name, title in zip(names, search_map(search_wikipedia_player, names)) if title}
+    # A search often finds a page this batch has just fetched (often the
+    # very page it is a fallback for), which is taken as it is
+    fetched = {page['title']: page for page in contents.values() if page}
+    pages = {
+        title: fetched[title] for name, title in searched.items()
+        if title in fetched and not (name in full_pages and fetched[title].get('lead'))
+    }
+    missing = {name: title for name, title in searched.items() if title not in pages}
+    if missing:
+        try:
+            with metrics.timer('fetch'):
+                pages.update(fetch_pages(sorted(set(missing.values())), cache,
+                                         lead=False if full_pages.intersection(missing) else None))
+        except Exception as e:
+            log.warning("Error fetching Wikipedia pages for search results: %s", e)
+            for name in missing:
+                metrics.fail(name, 'fetch_error')
+    for name in names:
+        outbox.put((name, pages.get(searched[name]) if name in searched else fallback[name]))
+
+
+def _parse(parse_queue, merge_queue, slots, workers, cache, stop):
+    """Parse stage: dispatch pages to the process pool until the fetch stage is done."""
+    def finish(name, page, future):
+        if stop.is_set():
+            # Cancelled, or no longer wanted
+            return
+        page['parser_version'] = PARSER_VERSION
+        try:
+            page['parsed'], seconds = future.result()
+        except Exception as e:
+            log.error("Error parsing %s: %s", page['title'], e, extra={'page': page['title']})
+            metrics.count('parse_errors')
+            page['parsed'] = None
+        else:
+            metrics.observe('parse', seconds)
+            if cache is not None:
+                cache.put_parsed(page['content'], page['parsed'], PARSER_VERSION)
+        merge_queue.put((name, page))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            item = parse_queue.get()
+            if item is _DONE:
+                break
+            if stop.is_set():
+                continue
+            name, page = item
+            # Released by the merge stage once it has taken the result
+            slots.acquire()
+            if not page or not page.get('content') or page.get('parser_version') == PARSER_VERSION:
+                merge_queue.put((name, page))
+                continue
+            future = pool.submit(parse_worker, page['content'])
+            future.add_done_callback(partial(finish, name, page))
+        # Waits for every outstanding parse (and its callback)
+        pool.shutdown(cancel_futures=stop.is_set())
+    merge_queue.put(_DONE)
+
+
+def iter_player_pages(player_names, concurrency=DEFAULT_CONCURRENCY, cache=None,
+                      workers=None, index=None, queue_size=DEFAULT_QUEUE_SIZE, full_pages=()):
+    """
+    Resolve, fetch and parse the pages for every player.
+
+    Yields (player_name, page) pairs as pages come out of the parse stage,
+    with the parse result attached under 'parsed' (and 'parser_version').
+    `page` is None when the player's article could not be found. Network
+    stages use `concurrency` threads each (the shared client enforces the
+    actual request budget); parsing uses `workers` processes (default: one
+    per CPU core). Pages whose revision is already in `cache` are served
+    from it, along with their parse result when the parser is unchanged.
+    Players with an entry in `index` (a PlayerIndex) are fetched by page id
+    without a title lookup or search. The players named in `full_pages`
+    get their whole articles even when only lead sections are downloaded
+    otherwise (see wikipedia.LEAD_ONLY).
+    """
+    batches = list(chunked(player_names))
+    if not batches:
+        return
+    workers = workers or os.cpu_count() or 1
+    full_pages = set(full_pages)
+
+    batch_queue = queue.Queue()
+    for batch in batches:
+        batch_queue.put(batch)
+    batch_queue.put(_DONE)
+    fetch_queue = queue.Queue(maxsize=queue_size)
+    parse_queue = queue.Queue(maxsize=queue_size)
+    # Unbounded, but never holds more than `slots` pages
+    merge_queue = queue.Queue()
+    slots = threading.Semaphore(workers * 2)
+    stop = threading.Event()
+
+    # Searches get their own pool: a stage worker waiting on its searches
+    # must not occupy the threads those searches need
+    with ThreadPoolExecutor(max_workers=concurrency) as search_pool:
+        _start_stage('resolve', concurrency, partial(_resolve, search_map=search_pool.map, index=index),
+                     batch_queue, fetch_queue, stop)
+        _start_stage('fetch', concurrency, partial(_fetch, search_map=search_pool.map, cache=cache, full_pages=full_pages),
+                     fetch_queue, parse_queue, stop)
+        threading.Thread(target=_parse, name='parse', daemon=True,
+                         args=(parse_queue, merge_queue, slots, workers, cache, stop)).start()
+
+        done = False
+        try:
+            while True:
+                item = merge_queue.get()
+                if item is _DONE:
+                    done = True
+                    break
+                try:
+                    yield item
+                finally:
+                    slots.release()
+        finally:
+            if not done:
+                # Stopped early: let the stages run dry, taking what they
+                # still pass on so none of them blocks on a full queue
+                stop.set()
+                while merge_queue.get() is not _DONE:
+                    slots.release()
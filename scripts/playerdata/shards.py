@@ -0,0 +1,112 @@
+"""
+Sharded update runs and merging their results.
+
+`--shard i/n` makes a run process only the players whose name hashes to
+shard i of n (1-based). The hash is stable across runs, machines and
+Python versions, so n jobs with the same n cover every player exactly
+once. Instead of rewriting the target CSVs, a shard writes a result
+file: the updates for each target, parsed club spells, resolved page and
+failure reason of each of its players, plus the club title resolutions it
+made.
+
+merge_results() combines result files deterministically: when several
+files carry a result for the same player (overlapping or repeated runs),
+a successful update beats a failure, then the newer article revision
+wins, then the lower shard, and results that still tie (two files from
+the same shard) are ordered by their JSON form. Club resolutions prefer
+an article to "no article" the same way. The order the files are given in
+never matters.
+"""
+
+import hashlib
+import json
+import re
+
+from .cache import DEFAULT_CACHE_DIR
+from .files import write_atomic
+
+DEFAULT_SHARD_DIR = DEFAULT_CACHE_DIR / "shards"
+
+_SHARD_RE = re.compile(r'^(\d+)/(\d+)$')
+
+
+def parse_shard(text):
+    """Parse 'i/n' into (i, n); raises ValueError unless 1 <= i <= n."""
+    match = _SHARD_RE.match(text.strip())
+    if not match:
+        raise ValueError(f"expected a shard like 1/4, got {text!r}")
+    index, count = int(match.group(1)), int(match.group(2))
+    if not 1 <= index <= count:
+        raise ValueError(f"shard {index} is not between 1 and {count}")
+    return index, count
+
+
+def shard_of(name, count):
+    """The shard (1..count) a player belongs to."""
+    digest = hashlib.sha1(name.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % count + 1
+
+
+def default_shard_path(shard):
+    """Where a shard's result file goes by default."""
+    index, count = shard
+    return DEFAULT_SHARD_DIR / f"shard-{index}-of-{count}.json"
+
+
+def write_shard(path, shard, fingerprint, targets, players, clubs):
+    """
+    Save a shard's results.
+
+    `targets` names the target datasets of the run; `players` maps names
+    to {'updates' (by target name), 'spells', 'page', 'failure'}; `clubs`
+    maps club titles to (pageid, canonical title) resolutions.
+    """
+    index, count = shard
+    write_atomic(path, json.dumps({
+        'shard': f"{index}/{count}",
+        'fingerprint': fingerprint,
+        'targets': list(targets),
+        'players': players,
+        'clubs': clubs,
+    }, indent=1, sort_keys=True, ensure_ascii=False) + '\n')
+
+
+def read_shard(path):
+    """Load a result file written by write_shard()."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    data['shard'] = parse_shard(data['shard'])
+    return data
+
+
+def _preference(result, shard):
+    """Sort key of a player's result: the best one sorts first."""
+    revid = (result.get('page') or {}).get('revid') or 0
+    return (
+        not any((result.get('updates') or {}).values()), -revid, shard,
+        json.dumps(result, sort_keys=True, ensure_ascii=False),
+    )
+
+
+def merge_results(shards):
+    """
+    Combine loaded result files.
+
+    Returns ({name: result}, {title: resolution}, conflicts), where
+    `conflicts` counts players with more than one result.
+    """
+    candidates = {}
+    resolutions = {}
+    for data in shards:
+        for name, result in data['players'].items():
+            candidates.setdefault(name, []).append((_preference(result, data['shard']), result))
+        for title, resolution in data['clubs'].items():
+            resolutions.setdefault(title, []).append(tuple(resolution))
+    results = {name: min(found, key=lambda pair: pair[0])[1] for name, found in candidates.items()}
+    # A title that has an article in any shard's view wins over "no article"
+    clubs = {
+        title: min(found, key=lambda resolution: (resolution[0] is None, json.dumps(resolution)))
+        for title, found in resolutions.items()
+    }
+    conflicts = sum(1 for found in candidates.values() if len(found) > 1)
+    return results, clubs, conflicts
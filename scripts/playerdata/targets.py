@@ -0,0 +1,122 @@
+"""
+The datasets an update run keeps in sync with players' Wikipedia articles.
+
+Each target is a CSV in public/data with one row per player, declared in
+TARGETS with the fields it takes from a parse result. A run reads every
+selected target, sends the union of their players through the pipeline
+once (each article is fetched and parsed a single time) and fans every
+player's result out to the targets that list them. Adding a dataset
+means declaring it here.
+
+Targets that read beyond the lead section (the honours section for
+player-success.csv) make the run download whole articles for their
+players; the others only get the lead section.
+"""
+
+from pathlib import Path
+
+from .csvfile import STANDARD_ORDER, ordered_fieldnames, read_players, write_players
+from .dataset import format_spells, spells_from_stats, write_dataset
+from .metrics import metrics
+
+DATA_DIR = Path(__file__).resolve().parent.parent.parent / "public" / "data"
+
+
+class Target:
+    """
+    One target dataset.
+
+    `updates(data, registry)` turns a player's PlayerStats into the CSV
+    fields to set ({} when the page has nothing for this target).
+    `columns` orders the CSV's columns (others follow alphabetically).
+    `full_pages` is True when the fields come from beyond the lead
+    section. `clubs` is True when the target needs club spells resolved to
+    canonical clubs first, and `columnar` names the structured dataset for
+    the frontend written next to the CSV (see dataset.py), if any.
+    `lineterminator` keeps the line endings the file already has.
+    """
+
+    def __init__(self, name, updates, columns, full_pages=False, clubs=False, columnar=None,
+                 lineterminator='\r\n'):
+        self.name = name
+        self.updates = updates
+        self.columns = columns
+        self.full_pages = full_pages
+        self.clubs = clubs
+        self.columnar = columnar
+        self.lineterminator = lineterminator
+
+    def __repr__(self):
+        return f"Target({self.name!r})"
+
+    @property
+    def filename(self):
+        return f"{self.name}.csv"
+
+    def path(self, data_dir=None):
+        """Location of the target's CSV, in `data_dir` (default: DATA_DIR)."""
+        return Path(data_dir or DATA_DIR) / self.filename
+
+    def read(self, data_dir=None):
+        """The target's rows, as dicts."""
+        return read_players(self.path(data_dir))
+
+    def write(self, players, spells=None, registry=None, data_dir=None):
+        """
+        Write the target's CSV, and its columnar dataset if it has one
+        (atomically, and only what changed).
+
+        Returns (label, path, written) for every file.
+        """
+        fieldnames = ordered_fieldnames(players, self.columns)
+        path = self.path(data_dir)
+        with metrics.timer('write_csv'):
+            files = [("CSV file", path, write_players(players, fieldnames, path, self.lineterminator))]
+        if self.columnar:
+            columnar_path = path.with_name(self.columnar)
+            with metrics.timer('write_dataset'):
+                files.append(("Player dataset", columnar_path,
+                              write_dataset(players, fieldnames, columnar_path, spells, registry)))
+        return files
+
+
+def club_updates(data, registry):
+    """players.csv fields: club spells (consecutive ones at the same club merged) and totals."""
+    result = {}
+    if data.clubs:
+        result['clubs_with_years'] = format_spells(registry.merge_spells(spells_from_stats(data)))
+    for field, value in data.totals().items():
+        result[field] = str(value)
+    return result
+
+
+def honours_updates(data, registry=None):
+    """player-success.csv fields: trophy counts from the honours section."""
+    if data.honours is None:
+        return {}
+    return {
+        'individual_trophies': str(data.honours.individual_trophies),
+        'team_trophies': str(data.honours.team_trophies),
+    }
+
+
+SUCCESS_ORDER = [
+    'name', 'country_provenance', 'individual_trophies', 'team_trophies',
+    'social_followers', 'mentions_count', 'team',
+]
+
+TARGETS = {
+    target.name: target
+    for target in (
+        Target('players', club_updates, STANDARD_ORDER, clubs=True, columnar='players.json'),
+        # Maintained by hand before it was a target, with Unix line endings
+        Target('player-success', honours_updates, SUCCESS_ORDER, full_pages=True, lineterminator='\n'),
+    )
+}
+
+
+def select_targets(names=None):
+    """The targets called `names` (every target when None), in declaration order."""
+    if not names:
+        return list(TARGETS.values())
+    return [target for name, target in TARGETS.items() if name in names]
@@ -0,0 +1,72 @@
+"""
+Watch mode: update players as their articles are edited instead of sweeping weekly.
+
+Every poll asks the API for the current revision ids of the pages in the
+player index only, 50 pages a request (prop=revisions without content),
+and hands the pages whose revision moved to the update. The cost of a
+poll depends on the roster, not on how busy the wiki is. The revisions
+the data files are up to date with are kept in a small JSON file, saved
+only after the edits they cover have been written, so a restarted
+watcher neither replays edits nor misses any, however long it was down.
+A page whose players could not be updated keeps the revision it had in
+the state, so the next poll sees it as edited again.
+
+Pages the state has no revision for yet (players indexed since) are
+compared with the revision in the page cache. Players not in the index
+yet are not watched; they are picked up by full runs, which also index
+them.
+"""
+
+import json
+from pathlib import Path
+
+from .cache import DEFAULT_CACHE_DIR
+from .files import write_atomic
+from .wikipedia import chunked, fetch_pages_by_id
+
+DEFAULT_STATE_PATH = DEFAULT_CACHE_DIR / "watch-state.json"
+# Seconds between polls
+DEFAULT_INTERVAL = 60
+
+
+class WatchState:
+    """The revisions of the watched pages the data files are up to date with."""
+
+    def __init__(self, path, source):
+        """
+        Load the state at `path`. A state saved for another `source` (API
+        URL), or in the change feed format of earlier versions, does not
+        apply, so `revids` is None then, as for a new watcher.
+        """
+        self.path = Path(path)
+        self.source = source
+        self.revids = None
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('source') == source and 'revids' in state:
+                self.revids = {int(pageid): revid for pageid, revid in state['revids'].items()}
+
+    def save(self, revids):
+        """Move to `revids` ({page id: revision id, or None for a missing page}) and persist them."""
+        self.revids = dict(revids)
+        write_atomic(self.path, json.dumps({
+            'source': self.source,
+            'revids': {str(pageid): revid for pageid, revid in sorted(self.revids.items())},
+        }, indent=2) + '\n')
+
+
+def edited_pages(known):
+    """
+    Check the current revisions of the pages in `known` ({page id: revision
+    id the data is up to date with, or None when unknown}).
+
+    Returns (page ids whose revision differs, {page id: current revision
+    id}), where deleted pages have the revision None.
+    """
+    current = {}
+    for batch in chunked(sorted(known)):
+        for pageid, page in fetch_pages_by_id(batch, content=False).items():
+            current[int(pageid)] = page['revid'] if page else None
+    edited = {pageid for pageid, revid in current.items() if revid != known[pageid]}
+    return edited, current
@@ -0,0 +1,290 @@
+"""
+Wikipedia (MediaWiki) API access for the player data scripts.
+
+Page lookups are batched: the API accepts up to 50 pipe-joined titles or
+page ids per query, and resolves redirects and title normalization in the
+same round-trip, so a roster is resolved and fetched in a handful of calls
+instead of three calls per player.
+
+Only the lead section (section 0, where the infobox is) of an article is
+downloaded by default; the whole article is fetched only when its lead has
+no football infobox. configure(lead_only=False) always fetches whole pages.
+
+Every request goes through api_get() and the shared client, which caps the
+number of requests in flight and paces them with a token bucket, so callers
+can issue requests from as many threads as they like without exceeding the
+agreed budget.
+"""
+
+import logging
+
+from . import client
+from .infobox import has_football_infobox
+from .metrics import metrics
+
+# Wikipedia API endpoint
+WIKIPEDIA_API = "https://en.wikipedia.org/w/api.php"
+
+# Maximum number of titles/pageids the API accepts per query (non-bot accounts)
+BATCH_SIZE = 50
+
+# Download only the lead section of articles (see _download())
+LEAD_ONLY = True
+
+log = logging.getLogger(__name__)
+
+
+def looks_like_player_page(page):
+    """
+    Return True if a fetched page carries a football infobox.
+
+    Disambiguation pages and namesakes resolved by title alone don't.
+    """
+    return bool(page and has_football_infobox(page.get("content")))
+
+
+def chunked(items, size=BATCH_SIZE):
+    """Yield successive lists of at most `size` items."""
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def configure(api_url=None, lead_only=None):
+    """
+    Point the scripts at another MediaWiki install, e.g. a local stub server,
+    and/or choose between lead-section and whole-page downloads.
+    """
+    global WIKIPEDIA_API, LEAD_ONLY
+    if api_url:
+        WIKIPEDIA_API = api_url
+    if lead_only is not None:
+        LEAD_ONLY = lead_only
+
+
+def api_get(params):
+    """Perform a GET against the API (with retries) and return the decoded JSON."""
+    return client.get_json(WIKIPEDIA_API, params)
+
+
+def _query_revisions(params, content=True, section=None):
+    """
+    Run a prop=revisions query, following `continue` until every page is complete.
+
+    Returns (pages, normalized, redirects) where `pages` is keyed by page title.
+    Large batches may be split by the API when the result size limit is hit,
+    in which case some pages come back without content and a continuation
+    token is returned. With `content=False` only revision ids and timestamps
+    are requested, which is cheap enough to check a whole roster for edits.
+    With `section=0` only the lead section's wikitext is downloaded, and the
+    pages are marked with 'lead': True.
+    """
+    params = {
+        "action": "query",
+        "format": "json",
+        "formatversion": "2",
+        "prop": "revisions",
+        "rvprop": "ids|timestamp|content" if content else "ids|timestamp",
+        "redirects": "1",
+        **({"rvslots": "main"} if content else {}),
+        **({"rvsection": str(section)} if content and section is not None else {}),
+        **params,
+    }
+
+    pages = {}
+    normalized = {}
+    redirects = {}
+    continuation = {}
+    while True:
+        data = api_get({**params, **continuation})
+        query = data.get("query", {})
+
+        for item in query.get("normalized", []):
+            normalized[item["from"]] = item["to"]
+        for item in query.get("redirects", []):
+            redirects[item["from"]] = item["to"]
+
+        for page in query.get("pages", []):
+            title = page.get("title")
+            entry = pages.setdefault(title, {
+                "pageid": page.get("pageid"),
+                "title": title,
+                "missing": "missing" in page or "invalid" in page,
+                "revid": None,
+                "timestamp": None,
+                "content": None,
+                "lead": content and section == 0,
+            })
+            revisions = page.get("revisions") or []
+            if revisions:
+                revision = revisions[0]
+                entry["revid"] = revision.get("revid")
+                entry["timestamp"] = revision.get("timestamp")
+                if content:
+                    entry["content"] = revision.get("slots", {}).get("main", {}).get("content")
+
+        if "continue" not in data:
+            break
+        continuation = data["continue"]
+
+    return pages, normalized, redirects
+
+
+def _is_complete(page, content):
+    """Whether a query result describes an existing page (with its wikitext if requested)."""
+    if not page or page["missing"] or page["revid"] is None:
+        return False
+    return bool(page["content"]) if content else True
+
+
+def fetch_pages_by_title(titles, content=True, section=None):
+    """
+    Fetch wikitext for up to BATCH_SIZE titles in one query.
+
+    Returns a dict mapping each requested title to a page dict
+    ({'pageid', 'title', 'revid', 'timestamp', 'content', 'lead'}) or None
+    when the page does not exist. With `content=False` the wikitext is not
+    downloaded; with `section=0` only its lead section is.
+    """
+    titles = list(titles)
+    if not titles:
+        return {}
+    if len(titles) > BATCH_SIZE:
+        raise ValueError(f"At most {BATCH_SIZE} titles can be fetched per query")
+
+    pages, normalized, redirects = _query_revisions({"titles": "|".join(titles)}, content, section)
+
+    results = {}
+    for requested in titles:
+        # Follow the same chain the API applied: normalization, then redirects
+        title = normalized.get(requested, requested)
+        seen = set()
+        while title in redirects and title not in seen:
+            seen.add(title)
+            title = redirects[title]
+        page = pages.get(title)
+        results[requested] = page if _is_complete(page, content) else None
+    return results
+
+
+def fetch_pages_by_id(pageids, content=True, section=None):
+    """
+    Fetch wikitext (or the `section` given) for up to BATCH_SIZE page ids in one query.
+
+    Returns a dict mapping each page id (as a string) to a page dict or None.
+    """
+    pageids = [str(pageid) for pageid in pageids]
+    if not pageids:
+        return {}
+    if len(pageids) > BATCH_SIZE:
+        raise ValueError(f"At most {BATCH_SIZE} page ids can be fetched per query")
+
+    pages, _, _ = _query_revisions({"pageids": "|".join(pageids)}, content, section)
+
+    by_id = {
+        str(page["pageid"]): page
+        for page in pages.values()
+        if page["pageid"] is not None and _is_complete(page, content)
+    }
+    return {pageid: by_id.get(pageid) for pageid in pageids}
+
+
+def _download(pageids, lead):
+    """
+    Download wikitext for up to BATCH_SIZE page ids.
+
+    With `lead`, only the lead sections are requested, and the whole
+    article only for pages whose lead has no football infobox (or came back
+    empty). Returns a dict like fetch_pages_by_id().
+    """
+    if not lead:
+        return fetch_pages_by_id(pageids)
+    fetched = fetch_pages_by_id(pageids, section=0)
+    fallback = [
+        pageid for pageid, page in fetched.items()
+        if page is None or not has_football_infobox(page["content"])
+    ]
+    if fallback:
+        metrics.count("lead_fallbacks", len(fallback))
+        fetched.update(fetch_pages_by_id(fallback))
+    return fetched
+
+
+def fetch_contents(pages, cache=None, lead=None):
+    """
+    Fetch wikitext for pages already resolved with content=False.
+
+    Pages whose current revision is in `cache` are served from it (with their
+    stored parse result under 'parsed'); the rest are downloaded by page id,
+    BATCH_SIZE per query (just their lead sections with `lead`, which
+    defaults to LEAD_ONLY), and written back to the cache. Stored lead
+    sections only count with `lead`.
+
+    Returns a dict mapping each page id (as a string) to a page dict or None.
+    """
+    lead = LEAD_ONLY if lead is None else lead
+    results = {}
+    stale = []
+    for page in pages:
+        pageid = str(page["pageid"])
+        if pageid in results or pageid in stale:
+            continue
+        cached = cache.get(page["pageid"], page["revid"], lead=lead) if cache is not None else None
+        if cached is not None:
+            results[pageid] = cached
+        else:
+            stale.append(pageid)
+
+    for batch in chunked(stale):
+        fetched = _download(batch, lead)
+        for pageid in batch:
+            page = fetched.get(pageid)
+            if page is not None and cache is not None:
+                cache.put(page)
+            results[pageid] = page
+
+    return results
+
+
+def fetch_pages(titles, cache=None, lead=None):
+    """
+    Fetch wikitext for up to BATCH_SIZE titles, reusing cached revisions.
+
+    Without a cache (and with whole articles) this is a single
+    fetch_pages_by_title() call. Otherwise only revision ids are requested
+    for the titles, and wikitext is downloaded (by page id, in one more
+    query) just for pages whose current revision is not in the cache.
+    `lead` is as for fetch_contents().
+    """
+    lead = LEAD_ONLY if lead is None else lead
+    if cache is None and not lead:
+        return fetch_pages_by_title(titles)
+
+    current = fetch_pages_by_title(titles, content=False)
+    contents = fetch_contents([page for page in current.values() if page], cache, lead)
+    return {
+        title: contents.get(str(page["pageid"])) if page else None
+        for title, page in current.items()
+    }
+
+
+def search_wikipedia_player(player_name):
+    """Search for player Wikipedia page by name."""
+    params = {
+        "action": "query",
+        "format": "json",
+        "list": "search",
+        "srsearch": player_name,
+        "srlimit": 1
+    }
+
+    try:
+        with metrics.timer("search"):
+            data = api_get(params)
+        search_results = data.get("query", {}).get("search", [])
+        if search_results:
+            return search_results[0]["title"]
+        return None
+    except Exception as e:
+        log.warning("Error searching Wikipedia for %s: %s", player_name, e, extra={"player": player_name})
+        return None
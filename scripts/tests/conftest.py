@@ -0,0 +1,49 @@
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+FIXTURES_DIR = SCRIPTS_DIR / "benchmarks" / "fixtures"
+
+# The scripts import `playerdata` from their own directory
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from playerdata import client, targets, wikipedia  # noqa: E402
+from playerdata.metrics import metrics  # noqa: E402
+
+
+@pytest.fixture
+def fixtures():
+    """The recorded articles of the benchmarks, by name."""
+    return {path.stem: path.read_text(encoding='utf-8') for path in sorted(FIXTURES_DIR.glob('*.wiki'))}
+
+
+@pytest.fixture(scope='session')
+def update_script():
+    """scripts/update-player-data.py, imported as a module."""
+    spec = importlib.util.spec_from_file_location('update_player_data', SCRIPTS_DIR / 'update-player-data.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """An empty directory the target CSVs are read from and written to instead of public/data."""
+    path = tmp_path / 'data'
+    path.mkdir()
+    monkeypatch.setattr(targets, 'DATA_DIR', path)
+    return path
+
+
+@pytest.fixture
+def script_globals(monkeypatch):
+    """Undo the API and request budget settings a script run makes, and start with fresh metrics."""
+    for name in ('WIKIPEDIA_API', 'LEAD_ONLY'):
+        monkeypatch.setattr(wikipedia, name, getattr(wikipedia, name))
+    for name in ('_rate_limiter', '_in_flight', '_pool_size'):
+        monkeypatch.setattr(client, name, getattr(client, name))
+    monkeypatch.setattr(client, 'stats', client.RequestStats())
+    metrics.reset()
@@ -0,0 +1,105 @@
+import itertools
+
+import pytest
+
+from playerdata import cache as cache_module
+from playerdata.cache import PageCache
+from playerdata.infobox import ClubSpell, PlayerStats
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Make each `last_used` stamp one second later than the one before."""
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(cache_module.time, 'time', lambda: next(ticks))
+
+
+def page(pageid, revid, content, lead=False):
+    return {'pageid': pageid, 'title': f"Player {pageid}", 'revid': revid,
+            'timestamp': '2024-01-01T00:00:00Z', 'content': content, 'lead': lead}
+
+
+def test_reuses_unchanged_revision(tmp_path):
+    cache = PageCache(tmp_path / "pages.sqlite")
+    cache.put(page(1, 10, "Some text"))
+    assert cache.get(1, 10)['content'] == "Some text"
+    # A newer revision on the wiki is a miss
+    assert cache.get(1, 11) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.close()
+
+    # ...and a reopened cache still has the page
+    cache = PageCache(tmp_path / "pages.sqlite")
+    assert cache.get(1, 10)['revid'] == 10
+    cache.close()
+
+
+def test_lead_only_served_to_lead_callers(tmp_path):
+    cache = PageCache(tmp_path / "pages.sqlite")
+    cache.put(page(1, 10, "Lead", lead=True))
+    assert cache.get(1, 10) is None
+    assert cache.get(1, 10, lead=True)['lead']
+    cache.close()
+
+
+def test_read_false_always_misses(tmp_path):
+    cache = PageCache(tmp_path / "pages.sqlite", read=False)
+    cache.put(page(1, 10, "Some text"))
+    assert cache.get(1, 10) is None
+    assert cache.latest(1)['revid'] == 10
+    cache.close()
+
+
+def test_evicts_least_recently_used(tmp_path, clock):
+    cache = PageCache(tmp_path / "pages.sqlite", max_bytes=25)
+    for pageid in (1, 2, 3):
+        cache.put(page(pageid, 10, str(pageid) * 10))
+    # Page 1 is used again, so page 2 is now the least recently used
+    cache.get(1, 10)
+    assert cache.evict() == 1
+    assert cache.latest(2) is None
+    assert cache.latest(1) is not None and cache.latest(3) is not None
+
+    # Size counts the UTF-8 bytes of the text, not its characters
+    cache.max_bytes = 10
+    cache.put(page(4, 10, "é" * 5))
+    assert cache.evict() == 2
+    assert cache.latest(4) is not None
+    cache.close()
+
+
+def test_evicting_a_page_drops_its_text_and_parse(tmp_path):
+    cache = PageCache(tmp_path / "pages.sqlite", max_bytes=0)
+    cache.put(page(1, 10, "Some text"))
+    cache.put_parsed("Some text", None, cache_module.PARSER_VERSION)
+    cache.evict()
+    counts = [cache._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+              for table in ("pages", "blobs", "parses")]
+    assert counts == [0, 0, 0]
+    cache.close()
+
+
+def test_shared_text_is_parsed_once(tmp_path):
+    cache = PageCache(tmp_path / "pages.sqlite")
+    stats = PlayerStats([ClubSpell("Arsenal", 2010, None)], international_appearances=5)
+    cache.put(page(1, 10, "Same text"))
+    cache.put_parsed("Same text", stats, cache_module.PARSER_VERSION)
+    # A revert to identical text reuses the memoized parse
+    cache.put(page(1, 12, "Same text"))
+    parsed = cache.get(1, 12)['parsed']
+    assert parsed.clubs[0].name == "Arsenal" and parsed.international_appearances == 5
+    cache.close()
+
+
+def test_parses_are_dropped_with_a_new_parser_version(tmp_path, monkeypatch):
+    cache = PageCache(tmp_path / "pages.sqlite")
+    cache.put(page(1, 10, "Some text"))
+    cache.put_parsed("Some text", PlayerStats(international_appearances=5), cache_module.PARSER_VERSION)
+    assert cache.get(1, 10)['parser_version'] == cache_module.PARSER_VERSION
+
+    monkeypatch.setattr(cache_module, 'PARSER_VERSION', "changed")
+    stored = cache.get(1, 10)
+    # The page is still a hit, but its text has to be parsed again
+    assert stored['content'] == "Some text"
+    assert stored['parsed'] is None and stored['parser_version'] is None
+    cache.close()
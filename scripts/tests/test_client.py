@@ -0,0 +1,93 @@
+import json
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from playerdata import client
+from playerdata.fakewiki import FakeWiki
+from playerdata.ratelimit import TokenBucket
+
+
+class FlakyWiki(FakeWiki):
+    """A FakeWiki that answers its first requests with the given (status, body, headers)."""
+
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = list(failures)
+
+    def _respond(self, path):
+        if self.failures:
+            with self._lock:
+                self.requests += 1
+            return self.failures.pop(0)
+        return super()._respond(path)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Delays the client slept for between attempts (without sleeping)."""
+    slept = []
+    monkeypatch.setattr(client.time, 'sleep', slept.append)
+    monkeypatch.setattr(client, '_rate_limiter', TokenBucket(1000, 10))
+    monkeypatch.setattr(client, 'stats', client.RequestStats())
+    return slept
+
+
+def _query(wiki):
+    return client.get_json(wiki.url, {'action': 'query', 'format': 'json', 'list': 'search', 'srsearch': 'x'})
+
+
+def test_throttled_request_is_retried_after_retry_after(sleeps):
+    throttled = (429, b"Too many requests", {"Retry-After": "7"})
+    with FlakyWiki([throttled, throttled]) as wiki:
+        data = _query(wiki)
+    assert data['query']['search'] == []
+    assert sleeps == [7.0, 7.0]
+    assert (client.stats.requests, client.stats.retries, client.stats.failures) == (3, 2, 0)
+
+
+def test_maxlag_error_is_retried(sleeps):
+    lagged = (200, json.dumps({"error": {"code": "maxlag", "info": "Waiting for a database server: 6 seconds lagged"}})
+              .encode(), {"Content-Type": "application/json", "Retry-After": "5"})
+    with FlakyWiki([lagged]) as wiki:
+        _query(wiki)
+    assert sleeps == [5.0]
+
+
+def test_server_errors_back_off_with_full_jitter(sleeps):
+    with FlakyWiki([(503, b"Unavailable", {})] * 3) as wiki:
+        _query(wiki)
+    assert len(sleeps) == 3
+    for attempt, delay in enumerate(sleeps):
+        assert 0 <= delay <= client.BACKOFF_BASE * 2 ** attempt
+
+
+def test_gives_up_after_max_retries(sleeps):
+    with FakeWiki(throttle=1.0, retry_after=3) as wiki:
+        with pytest.raises(client.RetryableError, match="HTTP 429"):
+            _query(wiki)
+        assert wiki.requests == client.MAX_RETRIES + 1
+    assert sleeps == [3.0] * client.MAX_RETRIES
+    assert client.stats.failures == 1
+
+
+def test_client_errors_are_not_retried(sleeps):
+    import requests
+
+    with FlakyWiki([(404, b"Not found", {})]) as wiki:
+        with pytest.raises(requests.HTTPError):
+            _query(wiki)
+    assert sleeps == []
+    assert client.stats.failures == 1
+
+
+def test_parse_retry_after():
+    assert client.parse_retry_after("120") == 120.0
+    assert client.parse_retry_after("-3") == 0.0
+    assert client.parse_retry_after(None) is None
+    assert client.parse_retry_after("soon") is None
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=90), usegmt=True)
+    assert 85 <= client.parse_retry_after(later) <= 90
+    earlier = format_datetime(datetime.now(timezone.utc) - timedelta(seconds=90), usegmt=True)
+    assert client.parse_retry_after(earlier) == 0.0
@@ -0,0 +1,97 @@
+from playerdata.honours import parse_honours
+
+# Honours sections as articles write them: groups as bold lines...
+BOLD_GROUPS = """
+==Honours==
+'''Barcelona'''
+* [[Liga F|Primera División]]: 2011–12, 2012–13, 2013–14, 2014–15, 2019–20
+* [[Copa de la Reina de Fútbol|Copa de la Reina]]: 2013, 2014, 2017
+* [[UEFA Women's Champions League]]: [[2020–21 UEFA Women's Champions League|2020–21]], 2022–23; runner-up: 2018–19, 2021–22
+'''Barcelona B'''
+* [[Segunda División Pro]]: 2010–11
+
+'''Spain U17'''
+* [[UEFA Women's Under-17 Championship]]: 2010, 2011
+'''Spain U19'''
+* [[UEFA Women's Under-19 Championship]]: runner-up: 2012
+'''Spain'''
+* [[Algarve Cup]]: 2017<ref>{{cite web|title=Algarve Cup 2017}}</ref>
+* [[Cyprus Women's Cup]]: 2018
+
+'''Individual'''
+* [[Ballon d'Or Féminin]]: 2021, 2022
+* [[The Best FIFA Women's Player]]: 2021, 2022
+* [[IFFHS]] World's Best Woman Playmaker: 2021
+
+'''Orders'''
+* [[File:ESP Real Orden del Merito Deportivo.svg|40px]] Gold Medal of the [[Royal Order of Sports Merit]]: 2023
+
+==References==
+{{reflist}}
+"""
+
+# ...and as subheadings, with the side's groups nested inside them
+SUBHEADINGS = """
+==Career honours==
+===Club===
+'''Olympique Lyonnais'''
+* [[Division 1 Féminine]]: 2006–07, 2007–08
+* [[UEFA Women's Champions League]]:
+** Winners: 2010–11, 2011–12
+** Runners-up: 2009–10
+
+===Youth===
+'''Martinique U20'''
+* Caribbean Championship: 2007
+'''Lyon academy'''
+* [[Challenge National Féminin U19]]: 2006
+
+===International===
+'''France'''
+* [[SheBelieves Cup]]: 2017
+
+===Individual===
+'''UNFP'''
+* [[UNFP Female Player of the Year]]: 2014–15
+* [[FIFPro World XI]]: 2015, 2016
+
+===Orders and decorations===
+* [[Legion of Honour|Knight of the Legion of Honour]]: 2019
+* [[National Order of Merit (France)|Officer of the National Order of Merit]]: 2023
+
+===Records===
+* Most appearances in the Champions League: 2023
+"""
+
+
+def test_bold_groups():
+    honours = parse_honours(BOLD_GROUPS)
+    # 5 + 3 + 2 (runner-up places excluded) at Barcelona, 2 with Spain
+    assert honours.team_trophies == 12
+    assert honours.individual_trophies == 5
+
+
+def test_subheadings():
+    honours = parse_honours(SUBHEADINGS)
+    # 2 + 2 at Lyon, 1 with France
+    assert honours.team_trophies == 5
+    assert honours.individual_trophies == 3
+
+
+def test_youth_only_section_counts_nothing():
+    content = "Text.\n==Honours==\n'''Spain U19'''\n* [[UEFA Women's Under-19 Championship]]: 2012\n"
+    assert parse_honours(content) is None
+
+
+def test_headings_match_whole_words():
+    # "Border" is not "Orders", nor "Recordings" "Records"
+    content = (
+        "Text.\n==Honours==\n'''Western Border FC'''\n* League: 2020\n"
+        "'''Recordings United'''\n* Cup: 2021\n'''Individual awards'''\n* Golden Boot: 2021\n"
+    )
+    honours = parse_honours(content)
+    assert (honours.team_trophies, honours.individual_trophies) == (2, 1)
+
+
+def test_lead_section_has_no_honours():
+    assert parse_honours("{{Infobox football biography}}\n'''Someone''' is a footballer.") is None
@@ -0,0 +1,121 @@
+"""
+Differential check of the infobox parser against the implementation it
+replaced (legacy_infobox.py): both must extract the same clubs and totals
+from the benchmark fixtures and from generated infobox variants that
+exercise the old regexes' quirks.
+"""
+
+import random
+
+import pytest
+
+from playerdata.infobox import parse_infobox
+
+import legacy_infobox
+
+CASES = 5000
+
+HEADERS = [
+    '{{Infobox football biography', '{{infobox football biography', '{{Infobox footballer',
+    '{{Infobox women football biography', '{{Infobox association football player',
+    '{{Infobox sportsperson', '{{Infobox person',
+]
+NUMBERED = ['goals', 'caps', 'nationalgoals', 'nationalcaps', 'youthgoals', 'youthcaps', 'Goals', 'CAPS']
+SINGLE = [
+    'goals', 'goal', 'totalgoals', 'careergoals', 'clubgoals', 'caps', 'cap', 'appearances',
+    'totalcaps', 'totalappearances', 'clubcaps', 'clubappearances', 'clubappearance',
+]
+CLUBS = ['Arsenal', 'Olympique Lyonnais Féminin', 'Chelsea F.C. Women', 'FC Barcelona Femení', 'Levante UD']
+DASHES = ['–', '—', '-', ' – ', ' to ', '']
+ENDS = ['', '2014', 'present', 'Present', '2020 (loan)', 'x']
+
+
+def _number(rng):
+    value = rng.choice([
+        str(rng.randint(0, 400)), f"{rng.randint(1, 3)},{rng.randint(100, 999)}", '', 'n/a',
+        f"{rng.randint(0, 99)} ({rng.randint(0, 9)})", f"{rng.randint(0, 99)}.5",
+        f"{{{{abbr|{rng.randint(0, 99)}|x}}}}", f"[[Note|{rng.randint(0, 99)}]]",
+    ])
+    if rng.random() < 0.2:
+        value += f"<ref>{rng.randint(0, 99)} games</ref>"
+    return value
+
+
+def _club(rng):
+    name = rng.choice(CLUBS)
+    return rng.choice([
+        name, f"[[{name}]]", f"[[{name}|{name.split()[0]}]]", f"→ [[{name}]] (loan)",
+        f"[[{name}]]<ref>x</ref>", f"{{{{flagicon|ESP}}}} [[{name}]]", '',
+    ])
+
+
+def _years(rng):
+    start = rng.randint(1995, 2023)
+    return rng.choice([
+        f"{start}{rng.choice(DASHES)}{rng.choice(ENDS)}", str(start), f"{start}–{str(start + 1)[2:]}",
+        'unknown', f"c. {start}", f"{start}–{start + 2}<ref>x</ref>",
+    ])
+
+
+def _param(rng, name, value):
+    return rng.choice(['| ', '|', ' | ', '', '|  ']) + name + rng.choice([' = ', '=', ' =', '= ', '  =  ']) + value
+
+
+def generate_infobox(rng):
+    """One random infobox (in a short article) in the formats seen in the wild."""
+    lines = [rng.choice(HEADERS)]
+    spells = rng.randint(0, 6)
+    for i in range(1, spells + 1):
+        for name, value in (
+            (f"years{i}", _years(rng)), (f"clubs{i}", _club(rng)),
+            (f"{rng.choice(NUMBERED)}{i}", _number(rng)),
+            (f"youthyears{i}", _years(rng)), (f"youthclubs{i}", _club(rng)),
+        ):
+            if rng.random() < 0.8:
+                lines.append(_param(rng, name, value))
+    for name in rng.sample(SINGLE, rng.randint(0, 4)):
+        lines.append(_param(rng, name, _number(rng)))
+    if rng.random() < 0.3 and len(lines) > 2:
+        # Several parameters on one line
+        i = rng.randrange(1, len(lines) - 1)
+        lines[i:i + 2] = [lines[i] + ' ' + lines[i + 1].lstrip()]
+    params = lines[1:]
+    if rng.random() < 0.5:
+        rng.shuffle(params)
+    body = '\n'.join([lines[0]] + params) + '\n}}'
+    return rng.choice(['', "'''Someone''' is a footballer.\n", '{{Short description|x}}\n']) + body + \
+        rng.choice(['', '\n\n==Career==\nText {{cite|x}}.', '\n{{Infobox football biography\n| goals1 = 9\n}}'])
+
+
+def legacy_result(content):
+    """The legacy parser's output in the current parser's terms: (clubs, totals) or None."""
+    result = legacy_infobox.parse_infobox(content)
+    if result is None:
+        return None
+    clubs = [(club['name'], club['start'], club['end']) for club in result['clubs']]
+    totals = {}
+    for kind, field in (('goals', 'goals'), ('appearances', 'appearances')):
+        for scope in ('career', 'club', 'international'):
+            if scope in result[kind]:
+                totals[f"{scope}_{field}"] = result[kind][scope]
+    return clubs, totals
+
+
+def current_result(content):
+    stats = parse_infobox(content)
+    if stats is None:
+        return None
+    return [(club.name, club.start, club.end) for club in stats.clubs], stats.totals()
+
+
+def test_fixtures_match_legacy_parser(fixtures):
+    for name, content in fixtures.items():
+        assert current_result(content) == legacy_result(content), name
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_generated_infoboxes_match_legacy_parser(seed):
+    rng = random.Random(seed)
+    for _ in range(CASES // 5):
+        content = generate_infobox(rng)
+        assert current_result(content) == legacy_result(content), content
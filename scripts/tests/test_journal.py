@@ -0,0 +1,162 @@
+"""Interrupted update runs against FakeWiki, and resuming them from the journal."""
+
+import json
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from playerdata import journal as journal_module
+from playerdata.fakewiki import FakeWiki
+from playerdata.journal import Journal
+from playerdata.metrics import metrics
+
+NAMES = [f"Player {i}" for i in range(6)]
+
+
+class RecordingWiki(FakeWiki):
+    """A FakeWiki that notes which pages' wikitext is downloaded, and can fail those requests."""
+
+    def __init__(self):
+        super().__init__(seed=1)
+        self.downloaded = []  # page ids
+        self.failing_downloads = 0
+
+    def _respond(self, path):
+        params = {key: values[0] for key, values in parse_qs(urlparse(path).query).items()}
+        if 'content' in params.get('rvprop', '') and 'pageids' in params:
+            with self._lock:
+                if self.failing_downloads:
+                    self.failing_downloads -= 1
+                    return 404, b'', {}
+                self.downloaded.extend(int(pageid) for pageid in params['pageids'].split('|'))
+        return super()._respond(path)
+
+
+@pytest.fixture
+def wiki(fixtures):
+    with RecordingWiki() as wiki:
+        wiki.pageids = {wiki.add_page(name, f"{fixtures['small']}\n[[Category:{name}]]\n"): name
+                        for name in NAMES}
+        yield wiki
+
+
+@pytest.fixture
+def update(update_script, wiki, data_dir, tmp_path, script_globals):
+    """Run an update of players.csv against the wiki; returns (status, names of the players downloaded)."""
+    (data_dir / 'players.csv').write_text(''.join(f"{line}\r\n" for line in ['name', *NAMES]), encoding='utf-8')
+
+    def update(*extra, api_url=None):
+        metrics.reset()
+        wiki.downloaded.clear()
+        status = update_script.main([
+            'update', '--dataset', 'players', '--api-url', api_url or wiki.url, '--workers', '1',
+            '--rate', '1000', '--burst', '100', '--no-cache', '--log-level', 'WARNING',
+            '--cache-path', str(tmp_path / 'cache.sqlite'), '--index-path', str(tmp_path / 'index.json'),
+            '--journal-path', str(tmp_path / 'journal.jsonl'), '--checkpoint-every', '1', *extra,
+        ])
+        return status, sorted(wiki.pageids[pageid] for pageid in wiki.downloaded)
+
+    return update
+
+
+@pytest.fixture
+def interrupt(update_script, monkeypatch):
+    """Make the next run stop with a KeyboardInterrupt once it has updated `after` players."""
+    def interrupt(after):
+        updated = []
+        update_player_data = update_script.update_player_data
+
+        def interrupting(player_name, page, cache=None):
+            if len(updated) == after:
+                monkeypatch.setattr(update_script, 'update_player_data', update_player_data)
+                raise KeyboardInterrupt
+            updated.append(player_name)
+            return update_player_data(player_name, page, cache)
+
+        monkeypatch.setattr(update_script, 'update_player_data', interrupting)
+        return updated
+
+    return interrupt
+
+
+def test_resumes_without_refetching_journaled_players(update, interrupt, tmp_path, data_dir):
+    done = interrupt(after=3)
+    with pytest.raises(KeyboardInterrupt):
+        update()
+    assert len((tmp_path / 'journal.jsonl').read_text(encoding='utf-8').splitlines()) == 1 + 3
+
+    status, downloaded = update()
+
+    assert status == 0
+    assert downloaded == sorted(set(NAMES) - set(done))
+    assert not (tmp_path / 'journal.jsonl').exists()
+    rows = (data_dir / 'players.csv').read_text(encoding='utf-8').splitlines()[1:]
+    assert len(rows) == len(NAMES) and all('Levante UD Femenino (2017-present)' in row for row in rows)
+
+
+@pytest.mark.parametrize('change', ['csv', 'parser', 'api'])
+def test_stale_journal_is_ignored(update, interrupt, wiki, data_dir, monkeypatch, change):
+    interrupt(after=3)
+    with pytest.raises(KeyboardInterrupt):
+        update()
+
+    api_url = None
+    if change == 'csv':
+        with open(data_dir / 'players.csv', 'a', encoding='utf-8', newline='') as f:
+            f.write("Player 6\r\n")
+        wiki.pageids[wiki.add_page("Player 6", wiki._pages["Player 0"]['content'])] = "Player 6"
+    elif change == 'parser':
+        monkeypatch.setattr(journal_module, 'PARSER_VERSION', 'changed')
+    else:
+        api_url = wiki.url.replace('127.0.0.1', 'localhost')
+
+    status, downloaded = update(api_url=api_url)
+
+    assert status == 0
+    assert downloaded == sorted(wiki.pageids.values())
+
+
+def test_restart_ignores_the_journal(update, interrupt, tmp_path):
+    interrupt(after=3)
+    with pytest.raises(KeyboardInterrupt):
+        update()
+
+    status, downloaded = update('--restart')
+
+    assert status == 0
+    assert downloaded == NAMES
+    assert not (tmp_path / 'journal.jsonl').exists()
+
+
+def test_failed_requests_are_retried_on_resume(update, interrupt, wiki, tmp_path):
+    # The whole batch's download fails, then the run is interrupted
+    wiki.failing_downloads = 1
+    interrupt(after=3)
+    with pytest.raises(KeyboardInterrupt):
+        update()
+    lines = (tmp_path / 'journal.jsonl').read_text(encoding='utf-8').splitlines()[1:]
+    assert [json.loads(line)['failure'] for line in lines] == ['fetch_error'] * 3
+
+    status, downloaded = update()
+
+    assert status == 0
+    assert downloaded == NAMES
+
+
+def test_torn_last_line_is_dropped(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    journal = Journal(path, 'inputs')
+    journal.record("Player 0", None, failure='not_found')
+    journal.checkpoint()
+    complete = path.read_bytes()
+    with open(path, 'ab') as f:
+        f.write(b'{"player": "Player 1", "par')
+
+    journal = Journal(path, 'inputs')
+    assert list(journal.entries) == ["Player 0"]
+    assert path.read_bytes() == complete
+
+    # Appending carries on from the last complete line
+    journal.record("Player 2", None, failure='not_found')
+    journal.checkpoint()
+    assert list(Journal(path, 'inputs').entries) == ["Player 0", "Player 2"]
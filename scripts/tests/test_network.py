@@ -0,0 +1,144 @@
+import random
+
+from playerdata.network import build_edges, build_roster
+
+YEAR = 2024
+
+
+def naive_edges(spells, current_year=YEAR):
+    """Every pair of two players' spells at a club with a year in common."""
+    years = [
+        set(range(start, (current_year if end is None else end) + 1)) if start is not None else set()
+        for _, _, start, end in spells
+    ]
+    return sorted(
+        (i, j)
+        for i, (player, club, _, _) in enumerate(spells)
+        for j, (other, other_club, _, _) in enumerate(spells)
+        if i < j and club == other_club and player != other and years[i] & years[j]
+    )
+
+
+def random_spells(seed, count=300):
+    """A spell table with unknown starts, open ends and some spells ending before they start."""
+    rng = random.Random(seed)
+    spells = []
+    for _ in range(count):
+        start = rng.choice([None] + list(range(1990, YEAR + 3)))
+        end = rng.choice([None, (start or 2000) + rng.randint(-3, 8)])
+        spells.append((rng.randrange(60), rng.choice('ABCDE'), start, end))
+    return spells
+
+
+def test_overlapping_spells_at_the_same_club():
+    spells = [(0, 'A', 2010, 2014), (1, 'A', 2012, 2016), (2, 'B', 2012, 2016)]
+    assert build_edges(spells, YEAR) == [(0, 1)]
+
+
+def test_adjacent_years():
+    # Both there in 2012...
+    assert build_edges([(0, 'A', 2010, 2012), (1, 'A', 2012, 2014)], YEAR) == [(0, 1)]
+    # ...but one left the year before the other came
+    assert build_edges([(0, 'A', 2010, 2011), (1, 'A', 2012, 2014)], YEAR) == []
+
+
+def test_open_ended_spells_run_to_the_current_year():
+    spells = [(0, 'A', 2010, None), (1, 'A', 2019, 2022)]
+    assert build_edges(spells, 2020) == [(0, 1)]
+    assert build_edges(spells, 2018) == []
+
+
+def test_spells_without_a_start_are_ignored():
+    assert build_edges([(0, 'A', None, 2014), (1, 'A', 2010, 2014)], YEAR) == []
+
+
+def test_malformed_spells_share_no_years():
+    # Ending before they start, whichever comes first at the club
+    assert build_edges([(0, 'A', 2010, 2005), (1, 'A', 2008, 2012)], YEAR) == []
+    assert build_edges([(0, 'A', 2008, 2005), (1, 'A', 2006, 2012)], YEAR) == []
+
+
+def test_one_edge_per_pair_of_spells():
+    # A player's own spells are not connected; two spells each give four pairs
+    spells = [(0, 'A', 2010, 2012), (0, 'A', 2014, 2016), (1, 'A', 2011, 2015), (1, 'A', 2016, None)]
+    edges = build_edges(spells, YEAR)
+    assert edges == [(0, 2), (1, 2), (1, 3)]
+    assert len(set(edges)) == len(edges)
+
+
+def test_matches_pairwise_comparison():
+    spells = random_spells(1)
+    assert build_edges(spells, YEAR) == naive_edges(spells)
+
+
+
+def decode_rosters(roster, spells):
+    """Replay the deltas like the frontend: {club: set of players} per year from roster['from']."""
+    current, rosters = {}, []
+    for joined, left in roster['deltas']:
+        for spell in left:
+            player, club, _, _ = spells[spell]
+            current[club].remove(player)
+            if not current[club]:
+                del current[club]
+        for spell in joined:
+            player, club, _, _ = spells[spell]
+            current.setdefault(club, set()).add(player)
+        rosters.append({club: set(players) for club, players in current.items()})
+    return rosters
+
+
+def roster_for_year(roster, rosters, year):
+    """The frontend's rosterForYear(): the last year's roster carries on."""
+    if not rosters or year < roster['from']:
+        return {}
+    return rosters[min(year - roster['from'], len(rosters) - 1)]
+
+
+def naive_roster(spells, year, current_year=YEAR):
+    """Who was at each club in `year`, straight from the spells."""
+    year = min(year, current_year)
+    members = {}
+    for player, club, start, end in spells:
+        end = current_year if end is None else min(end, current_year)
+        if start is not None and start <= year <= end:
+            members.setdefault(club, set()).add(player)
+    return members
+
+
+def assert_round_trip(spells):
+    roster = build_roster(spells, YEAR)
+    rosters = decode_rosters(roster, spells)
+    for year in range(1985, YEAR + 5):
+        assert roster_for_year(roster, rosters, year) == naive_roster(spells, year), year
+
+
+def test_roster_merges_a_players_spells_at_a_club():
+    spells = [
+        # Back-to-back, then overlapping: one stretch, 2010-2016
+        (0, 'A', 2010, 2012), (0, 'A', 2013, 2015), (0, 'A', 2014, 2016),
+        # A gap: two stretches
+        (1, 'A', 2011, 2012), (1, 'A', 2015, None),
+        (2, 'B', 2012, 2030),
+    ]
+    roster = build_roster(spells, YEAR)
+    assert roster['from'] == 2010
+    assert roster['deltas'][0] == [[0], []]
+    # Player 0's later spells neither leave nor join again
+    assert all(spell not in joined + left
+               for joined, left in roster['deltas'] for spell in (1, 2))
+    # Player 1 leaves after 2012 and comes back (as spell 4) in 2015
+    assert roster['deltas'][2013 - 2010] == [[], [3]]
+    assert roster['deltas'][2015 - 2010] == [[4], []]
+    assert_round_trip(spells)
+
+
+def test_roster_matches_spells_every_year():
+    for seed in range(5):
+        assert_round_trip(random_spells(seed))
+
+
+def test_empty_roster():
+    roster = build_roster([(0, 'A', None, 2012), (1, 'A', 2015, 2010)], YEAR)
+    assert roster == {'from': YEAR, 'deltas': []}
+    assert roster_for_year(roster, decode_rosters(roster, []), YEAR) == {}
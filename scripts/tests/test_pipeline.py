@@ -0,0 +1,76 @@
+import logging
+import threading
+
+import pytest
+
+from playerdata import wikipedia
+from playerdata.cache import PageCache
+from playerdata.fakewiki import FakeWiki
+from playerdata.pipeline import iter_player_pages
+
+ARTICLE = """{{Infobox football biography
+| name = %s
+| years1 = 2010–2014 | clubs1 = [[Arsenal W.F.C.|Arsenal]] | caps1 = 80 | goals1 = 20
+}}
+'''%s''' is a footballer.
+
+==Honours==
+'''Arsenal'''
+* [[FA WSL]]: 2011, 2012
+"""
+
+
+@pytest.fixture
+def wiki(monkeypatch):
+    with FakeWiki(seed=1) as wiki:
+        monkeypatch.setattr(wikipedia, 'WIKIPEDIA_API', wiki.url)
+        monkeypatch.setattr(wikipedia, 'LEAD_ONLY', True)
+        yield wiki
+
+
+def test_whole_articles_only_for_full_page_players(wiki):
+    for name in ('Lead Player', 'Honours Player'):
+        wiki.add_page(name, ARTICLE % (name, name))
+
+    pages = dict(iter_player_pages(['Lead Player', 'Honours Player'], workers=1, full_pages={'Honours Player'}))
+
+    assert pages['Lead Player']['lead']
+    assert '==Honours==' not in pages['Lead Player']['content']
+    assert pages['Lead Player']['parsed'].honours is None
+    assert not pages['Honours Player']['lead']
+    assert pages['Honours Player']['parsed'].honours.team_trophies == 2
+    assert pages['Honours Player']['parsed'].totals()['club_goals'] == 20
+
+
+def test_closing_early_stops_every_stage(wiki, tmp_path, caplog):
+    names = [f"Player {i}" for i in range(120)]
+    for name in names:
+        wiki.add_page(name, ARTICLE % (name, name))
+    cache = PageCache(tmp_path / "pages.sqlite")
+
+    pages = iter_player_pages(names, workers=2, cache=cache, queue_size=2)
+    next(pages)
+    pages.close()
+    # Nothing writes to the cache once the generator has returned
+    cache.close()
+
+    assert not [thread.name for thread in threading.enumerate()
+                if thread.name == 'parse' or thread.name.startswith(('resolve-', 'fetch-'))]
+    assert not [record for record in caplog.records if record.levelno >= logging.ERROR]
+
+
+def test_search_fallback_reuses_pages_fetched_in_the_batch(wiki, tmp_path):
+    # The search for a disambiguation page's title finds the page itself
+    wiki.add_page('Ana Romero', "'''Ana Romero''' may refer to:\n* Ana Romero (singer)\n")
+    wiki.add_page('Player', ARTICLE % ('Player', 'Player'))
+    cache = PageCache(tmp_path / "pages.sqlite")
+    requests = wiki.requests
+
+    pages = dict(iter_player_pages(['Ana Romero', 'Player'], workers=1, cache=cache))
+    cache.close()
+
+    assert pages['Ana Romero']['title'] == 'Ana Romero' and pages['Ana Romero']['parsed'] is None
+    # Resolved, downloaded (leads, then the page with no infobox in its
+    # lead whole) and searched, but not looked up again
+    assert wiki.requests - requests == 4
+    assert (cache.hits, cache.misses) == (0, 2)
@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+
+from playerdata.ratelimit import TokenBucket
+
+
+class FakeClock:
+    """A clock that only moves when someone sleeps."""
+
+    def __init__(self):
+        self.now = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        with self._lock:
+            self.now += seconds
+
+
+@pytest.mark.parametrize('rate, burst', [(1.0, 1), (4.0, 1), (2.0, 5)])
+def test_acquires_take_at_least_n_minus_burst_over_rate(rate, burst):
+    clock = FakeClock()
+    bucket = TokenBucket(rate, burst, clock=clock, sleep=clock.sleep)
+    for _ in range(20):
+        bucket.acquire()
+    assert clock.now == pytest.approx((20 - burst) / rate)
+
+
+def test_idle_time_refills_up_to_the_burst_only():
+    clock = FakeClock()
+    bucket = TokenBucket(1.0, 3, clock=clock, sleep=clock.sleep)
+    clock.now = 100.0
+    for _ in range(5):
+        bucket.acquire()
+    assert clock.now == pytest.approx(102.0)
+
+
+def test_concurrent_callers_never_exceed_the_rate():
+    # The clock stands still, so every caller's release time is the time it
+    # reserved: they must be spaced 1/rate apart, whatever the interleaving
+    rate = 10.0
+    releases = []
+    lock = threading.Lock()
+
+    def sleep(seconds):
+        with lock:
+            releases.append(seconds)
+
+    bucket = TokenBucket(rate, 1, clock=lambda: 0.0, sleep=sleep)
+    threads = [threading.Thread(target=lambda: [bucket.acquire() for _ in range(25)]) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # The first caller took the one token without sleeping
+    assert sorted(releases) == pytest.approx([i / rate for i in range(1, 8 * 25)])
+
+
+def test_rejects_invalid_settings():
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+    with pytest.raises(ValueError):
+        TokenBucket(1, capacity=0)
@@ -0,0 +1,58 @@
+import itertools
+
+import pytest
+
+from playerdata import client
+from playerdata.shards import merge_results
+
+
+def _shard(shard, players, clubs=None):
+    return {'shard': shard, 'players': players, 'clubs': clubs or {}}
+
+
+def _result(revid, goals):
+    return {
+        'updates': {'players': {'career_goals': goals}},
+        'spells': [],
+        'page': {'pageid': 1, 'title': 'Alexia Putellas', 'revid': revid},
+        'failure': None,
+    }
+
+
+def test_merge_prefers_success_then_newer_revision_then_lower_shard():
+    failed = {'updates': {'players': None}, 'spells': [], 'page': None, 'failure': 'not_found'}
+    shards = [
+        _shard((2, 2), {'a': _result(5, '1'), 'b': _result(5, '2'), 'c': _result(5, '3')}),
+        _shard((1, 2), {'a': failed, 'b': _result(4, '4'), 'c': _result(5, '5')}),
+    ]
+    results, _, conflicts = merge_results(shards)
+    assert results['a'] == _result(5, '1')
+    assert results['b'] == _result(5, '2')
+    assert results['c'] == _result(5, '5')
+    assert conflicts == 3
+
+
+def test_merge_does_not_depend_on_file_order():
+    # Two result files of the same shard, with results and club resolutions that tie otherwise
+    shards = [
+        _shard((1, 1), {'a': _result(5, '1')}, {'Arsenal': [None, None], 'Chelsea': [3, 'Chelsea F.C.']}),
+        _shard((1, 1), {'a': _result(5, '2')}, {'Arsenal': [2, 'Arsenal W.F.C.'], 'Chelsea': [4, 'Chelsea F.C. Women']}),
+    ]
+    merged = [merge_results(list(order)) for order in itertools.permutations(shards)]
+    assert merged[0] == merged[1]
+    results, clubs, _ = merged[0]
+    assert results['a'] == _result(5, '1')
+    assert clubs['Arsenal'] == (2, 'Arsenal W.F.C.')
+
+
+@pytest.mark.parametrize('argv, rate', [
+    (['update'], client.DEFAULT_RATE),
+    (['update', '--shard', '2/4'], client.DEFAULT_RATE / 4),
+    (['update', '--shard', '2/4', '--rate', '3'], 3),
+    (['watch'], client.DEFAULT_RATE),
+])
+def test_shards_split_the_request_budget(update_script, script_globals, monkeypatch, argv, rate):
+    monkeypatch.setattr(update_script, 'run', lambda args: 0)
+    monkeypatch.setattr(update_script, 'watch', lambda args: 0)
+    update_script.main(argv)
+    assert client._rate_limiter.rate == rate
@@ -0,0 +1,64 @@
+"""End-to-end checks of update-player-data.py runs that need no network."""
+
+import json
+from xml.sax.saxutils import escape
+
+import pytest
+import requests
+
+from playerdata.metrics import metrics
+
+DUMP = """<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.10/">
+  <page>
+    <title>{title}</title>
+    <ns>0</ns>
+    <id>1</id>
+    <revision>
+      <id>100</id>
+      <timestamp>2024-01-31T12:00:00Z</timestamp>
+      <text>{text}</text>
+    </revision>
+  </page>
+</mediawiki>
+"""
+
+
+def test_dump_run_sends_no_requests(update_script, fixtures, tmp_path, monkeypatch):
+    sent = []
+
+    def request(session, method, url, *args, **kwargs):
+        sent.append(url)
+        raise requests.ConnectionError("no network in a dump run")
+
+    monkeypatch.setattr(requests.Session, 'request', request)
+    dump = tmp_path / 'dump.xml'
+    dump.write_text(DUMP.format(title='Alexia Putellas', text=escape(fixtures['small'])), encoding='utf-8')
+
+    status = update_script.main([
+        'update', '--dump', str(dump), '--dry-run', '--player', 'Alexia Putellas', '--workers', '1',
+        '--cache-path', str(tmp_path / 'cache.sqlite'), '--index-path', str(tmp_path / 'index.json'),
+    ])
+
+    assert status == 0
+    assert sent == []
+
+
+@pytest.mark.parametrize('text, reason', [
+    ("{{Infobox football biography\n| name = Someone\n}}\n'''Someone''' is a footballer.", 'unrecognized_infobox'),
+    (None, 'no_infobox'),
+])
+def test_update_and_reparse_give_the_same_failure(update_script, fixtures, data_dir, tmp_path, script_globals,
+                                                  text, reason):
+    (data_dir / 'players.csv').write_text("name\r\nSomeone\r\n", encoding='utf-8')
+    dump = tmp_path / 'dump.xml'
+    dump.write_text(DUMP.format(title='Someone', text=escape(text or fixtures['no-infobox'])), encoding='utf-8')
+    common = ['--dataset', 'players', '--workers', '1', '--cache-path', str(tmp_path / 'cache.sqlite'),
+              '--index-path', str(tmp_path / 'index.json')]
+
+    update_script.main(['update', '--dump', str(dump), '--dry-run', *common, '--report', str(tmp_path / 'update.json')])
+    metrics.reset()
+    update_script.main(['reparse', *common, '--report', str(tmp_path / 'reparse.json')])
+
+    for command in ('update', 'reparse'):
+        report = json.loads((tmp_path / f'{command}.json').read_text(encoding='utf-8'))
+        assert report['failures']['players'] == {'Someone': reason}
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+import requests
+
+from playerdata import wikipedia
+from playerdata.fakewiki import FakeWiki
+from playerdata.watch import WatchState, edited_pages
+
+
+@pytest.fixture
+def wiki(monkeypatch):
+    with FakeWiki(seed=1) as wiki:
+        monkeypatch.setattr(wikipedia, 'WIKIPEDIA_API', wiki.url)
+        yield wiki
+
+
+def test_edited_pages_checks_tracked_revisions(wiki):
+    pageids = [wiki.add_page(f"Player {i}", "{{Infobox football biography}}") for i in range(60)]
+    known = {pageid: 1 for pageid in pageids}
+    known[pageids[-1]] = None  # not in the state or the cache yet
+    wiki.add_page("Player 3", "{{Infobox football biography}}\nEdited")
+    wiki.add_page("Untracked", "Edited")
+    requests = wiki.requests
+
+    edited, current = edited_pages(known)
+
+    assert edited == {pageids[3], pageids[-1]}
+    assert current == {**{pageid: 1 for pageid in pageids}, pageids[3]: 2}
+    assert wiki.requests - requests == 2  # 50 pages per request
+
+
+def test_deleted_pages_count_as_edited(wiki):
+    pageid = wiki.add_page("Player", "{{Infobox football biography}}")
+    edited, current = edited_pages({pageid: 1, pageid + 1: 4})
+    assert edited == {pageid + 1}
+    assert current == {pageid: 1, pageid + 1: None}
+
+
+def test_state_round_trip(tmp_path):
+    path = tmp_path / 'watch-state.json'
+    WatchState(path, 'api').save({12: 5, 3: None})
+    assert WatchState(path, 'api').revids == {12: 5, 3: None}
+    assert WatchState(path, 'other-api').revids is None
+
+
+def test_change_feed_state_starts_over(tmp_path):
+    # Earlier versions kept a place in the recent changes feed, which may be
+    # past the feed's retention by now: catch up with a full run instead
+    path = tmp_path / 'watch-state.json'
+    path.write_text(json.dumps({'source': 'api', 'token': '20240101000000|1'}), encoding='utf-8')
+    assert WatchState(path, 'api').revids is None
+
+
+def test_failed_update_is_retried_next_poll(update_script, fixtures, data_dir, tmp_path, script_globals, monkeypatch):
+    names = ["Player 0", "Player 1"]
+    (data_dir / 'players.csv').write_text(''.join(f"{line}\r\n" for line in ['name', *names]), encoding='utf-8')
+    download = wikipedia._download
+    failures = []
+
+    def flaky_download(pageids, lead):
+        if failures:
+            raise failures.pop()
+        return download(pageids, lead)
+
+    monkeypatch.setattr(wikipedia, '_download', flaky_download)
+
+    with FakeWiki(seed=1) as wiki:
+        for name in names:
+            wiki.add_page(name, fixtures['small'])
+        polled = []
+
+        def poll(known):
+            if not polled:
+                # Edited, but downloading the new revision fails once
+                wiki.add_page("Player 0", fixtures['small'].replace("Levante UD", "Real Madrid"))
+                failures.append(requests.ConnectionError("connection reset"))
+            polled.append(known)
+            return edited_pages(known)
+
+        monkeypatch.setattr(update_script, 'edited_pages', poll)
+        status = update_script.main([
+            'watch', '--dataset', 'players', '--api-url', wiki.url, '--workers', '1',
+            '--rate', '1000', '--burst', '100', '--interval', '0', '--cycles', '2', '--log-level', 'WARNING',
+            '--cache-path', str(tmp_path / 'cache.sqlite'), '--index-path', str(tmp_path / 'index.json'),
+            '--state', str(tmp_path / 'watch-state.json'),
+        ])
+
+    assert status == 0
+    assert not failures
+    # The second poll still has the revision from before the edit
+    assert polled[1] == polled[0]
+    rows = (data_dir / 'players.csv').read_text(encoding='utf-8').splitlines()
+    assert "Real Madrid Femenino (2017-present)" in rows[1]
+    assert "Real Madrid" not in rows[2]
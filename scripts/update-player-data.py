@@ -1,558 +1,604 @@
 #!/usr/bin/env python3
 """
 Script to update player club data from Wikipedia.
-Uses Wikipedia API to fetch up-to-date club information for players.
+Uses Wikipedia API to fetch up-to-date club information for players, and
+their trophies for player-success.csv (see playerdata/targets.py).
+
+    update-player-data.py [update]           update every player (the default)
+    update-player-data.py update --player X  update one row
+    update-player-data.py update --dry-run   print what would change
+    update-player-data.py reparse [--write]  replay cached pages (no network)
+    update-player-data.py watch              follow edits as they happen
+
+Modules only some commands need (the pipeline and its process pool, the
+dump reader, the HTTP stack) are imported when first used, so commands
+that stay offline start quickly.
 """
 
-import csv
-import re
+import argparse
+import difflib
 import json
-import requests
+import logging
+import sys
 import time
 from pathlib import Path
 
-# Wikipedia API endpoint
-WIKIPEDIA_API = "https://en.wikipedia.org/w/api.php"
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
 
-def fetch_wikipedia_page(player_name):
-    """Fetch Wikipedia page content for a player."""
-    # First get the page ID
-    params = {
-        "action": "query",
-        "format": "json",
-        "titles": player_name,
-    }
-    
-    headers = {
-        "User-Agent": "SportVizExperiment/1.0 (https://github.com/ginestra/sport-viz-experiment; contact@example.com)"
-    }
-    
-    try:
-        # Get page ID
-        response = requests.get(WIKIPEDIA_API, params=params, headers=headers, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        pages = data.get("query", {}).get("pages", {})
-        if not pages:
-            return None
-            
-        page_id = list(pages.keys())[0]
-        if page_id == "-1":  # Page not found
-            return None
-        
-        # Now fetch the actual content using parse action
-        params = {
-            "action": "parse",
-            "format": "json",
-            "pageid": page_id,
-            "prop": "wikitext",
-            "formatversion": "2"
-        }
-        
-        response = requests.get(WIKIPEDIA_API, params=params, headers=headers, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        if "parse" in data and "wikitext" in data["parse"]:
-            return data["parse"]["wikitext"]
-        return None
-    except Exception as e:
-        print(f"Error fetching Wikipedia page for {player_name}: {e}")
-        return None
+from playerdata import client, log as logsetup, wikipedia
+from playerdata.cache import DEFAULT_CACHE_PATH, DEFAULT_MAX_BYTES, PageCache
+from playerdata.clubs import ClubRegistry
+from playerdata.csvfile import apply_updates
+from playerdata.dataset import resolve_clubs, row_spells, spells_from_stats
+from playerdata.files import write_atomic
+from playerdata.index import DEFAULT_INDEX_PATH, PlayerIndex
+from playerdata.infobox import PARSER_VERSION, has_football_infobox, parse_article
+from playerdata.journal import DEFAULT_CHECKPOINT_EVERY, Journal, default_journal_path, fingerprint
+from playerdata.metrics import TRANSIENT_FAILURES, metrics, write_report
+from playerdata.shards import default_shard_path, parse_shard, shard_of, write_shard
+from playerdata.targets import TARGETS, select_targets
+from playerdata.watch import DEFAULT_INTERVAL, DEFAULT_STATE_PATH, WatchState, edited_pages
+from playerdata.wikipedia import looks_like_player_page
 
-def clean_wiki_text(text):
-    """Clean Wikipedia markup from text."""
-    if not text:
-        return None
-    # Remove wiki links [[text]] or [[text|display]]
-    text = re.sub(r'\[\[([^\]]+)\]\]', r'\1', text)
-    text = re.sub(r'\|[^\]]+', '', text)
-    # Remove refs
-    text = re.sub(r'<ref[^>]*>.*?</ref>', '', text, flags=re.DOTALL)
-    # Remove other markup
-    text = re.sub(r'{{.*?}}', '', text, flags=re.DOTALL)
-    text = text.strip().rstrip('}}').strip()
-    return text
+COMMANDS = ('update', 'reparse', 'watch')
 
-def extract_number(text):
-    """Extract first number from text, handling commas and parentheses."""
-    if not text:
-        return None
-    # Remove everything in parentheses (like "(3 goals)")
-    text = re.sub(r'\([^)]*\)', '', text)
-    # Find first number (may have commas like 1,234)
-    match = re.search(r'(\d{1,3}(?:,\d{3})*(?:\.\d+)?)', text.replace(',', ''))
-    if match:
-        try:
-            return int(float(match.group(1)))
-        except:
-            return None
-    return None
+log = logging.getLogger("update-player-data")
 
-def parse_infobox(content):
-    """Parse Wikipedia infobox to extract club information, goals, and appearances."""
-    if not content:
-        return None
-    
-    # Extract infobox (try different infobox types for football players)
-    # Note: Need to handle nested braces properly
-    infobox_patterns = [
-        r'\{\{Infobox football biography',
-        r'\{\{Infobox footballer',
-        r'\{\{Infobox.*football.*biography',
-        r'\{\{Infobox.*association.*football.*player',
-        r'\{\{Infobox.*footballer',
-    ]
-    
-    infobox_start = None
-    for pattern in infobox_patterns:
-        match = re.search(pattern, content, re.IGNORECASE)
-        if match:
-            infobox_start = match.start()
-            break
-    
-    if infobox_start is None:
-        return None
-    
-    # Find the matching closing braces (handle nested braces)
-    brace_count = 0
-    i = infobox_start
-    infobox_end = None
-    while i < len(content):
-        if content[i] == '{':
-            brace_count += 1
-        elif content[i] == '}':
-            brace_count -= 1
-            if brace_count == 0:
-                infobox_end = i + 1
-                break
-        i += 1
-    
-    if infobox_end is None:
-        return None
-    
-    infobox = content[infobox_start:infobox_end]
-    
-    
-    # Store original content for later use (e.g., international appearances)
-    result = {
-        'clubs': [],
-        'goals': {},
-        'appearances': {},
-        '_full_content': content  # Store for later parsing
-    }
-    
-    # Extract goals - Wikipedia infoboxes often use goals1, goals2, etc. for club career
-    # Sum all numbered goal entries (goals1, goals2, etc.) for club career
-    # Pattern: | goals1 = value or |goals1 = value (with optional space after pipe)
-    club_goals_total = 0
-    club_goals_pattern = r'\|?\s*goals(\d+)\s*=\s*([^\|\n]+)'
-    for match in re.finditer(club_goals_pattern, infobox, re.IGNORECASE):
-        goals_text = clean_wiki_text(match.group(2))
-        goals = extract_number(goals_text)
-        if goals is not None:
-            club_goals_total += goals
-    
-    if club_goals_total > 0:
-        result['goals']['club'] = club_goals_total
-    
-    # Extract international goals - nationalgoals1, nationalgoals2, etc.
-    intl_goals_total = 0
-    intl_goals_pattern = r'\|?\s*nationalgoals(\d+)\s*=\s*([^\|\n]+)'
-    for match in re.finditer(intl_goals_pattern, infobox, re.IGNORECASE):
-        goals_text = clean_wiki_text(match.group(2))
-        goals = extract_number(goals_text)
-        if goals is not None:
-            intl_goals_total += goals
-    
-    if intl_goals_total > 0:
-        result['goals']['international'] = intl_goals_total
-    
-    # Calculate career goals (club + international)
-    if club_goals_total > 0 or intl_goals_total > 0:
-        result['goals']['career'] = club_goals_total + intl_goals_total
-    
-    # Also check for simple |goals= or |totalgoals= format (fallback)
-    if 'career' not in result['goals']:
-        goal_patterns = [
-            r'\|goals?\s*=\s*([^\|\n]+)',
-            r'\|totalgoals?\s*=\s*([^\|\n]+)',
-            r'\|careergoals?\s*=\s*([^\|\n]+)',
-        ]
-        for pattern in goal_patterns:
-            match = re.search(pattern, infobox, re.IGNORECASE)
-            if match:
-                goals_text = clean_wiki_text(match.group(1))
-                goals = extract_number(goals_text)
-                if goals is not None:
-                    result['goals']['career'] = goals
-                    break
-    
-    # Check for |clubgoals= format (explicit club goals field)
-    if 'club' not in result['goals']:
-        club_goals_match = re.search(r'\|clubgoals?\s*=\s*([^\|\n]+)', infobox, re.IGNORECASE)
-        if club_goals_match:
-            club_goals_text = clean_wiki_text(club_goals_match.group(1))
-            club_goals = extract_number(club_goals_text)
-            if club_goals is not None:
-                result['goals']['club'] = club_goals
-    
-    # Extract appearances - Wikipedia infoboxes often use caps1, caps2, etc. for club career
-    # Sum all numbered caps entries (caps1, caps2, etc.) for club career
-    # Pattern: | caps1 = value or |caps1 = value (with optional space after pipe)
-    club_apps_total = 0
-    club_apps_pattern = r'\|?\s*caps(\d+)\s*=\s*([^\|\n]+)'
-    for match in re.finditer(club_apps_pattern, infobox, re.IGNORECASE):
-        apps_text = clean_wiki_text(match.group(2))
-        apps = extract_number(apps_text)
-        if apps is not None:
-            club_apps_total += apps
-    
-    if club_apps_total > 0:
-        result['appearances']['club'] = club_apps_total
-    
-    # Extract international appearances - nationalcaps1, nationalcaps2, etc.
-    intl_apps_total = 0
-    intl_apps_pattern = r'\|?\s*nationalcaps(\d+)\s*=\s*([^\|\n]+)'
-    for match in re.finditer(intl_apps_pattern, infobox, re.IGNORECASE):
-        apps_text = clean_wiki_text(match.group(2))
-        apps = extract_number(apps_text)
-        if apps is not None:
-            intl_apps_total += apps
-    
-    if intl_apps_total > 0:
-        result['appearances']['international'] = intl_apps_total
-    
-    # Calculate career appearances (club + international)
-    if club_apps_total > 0 or intl_apps_total > 0:
-        result['appearances']['career'] = club_apps_total + intl_apps_total
-    
-    # Also check for simple |caps= or |appearances= format (fallback)
-    if 'career' not in result['appearances']:
-        apps_patterns = [
-            r'\|caps?\s*=\s*([^\|\n]+)',
-            r'\|appearances?\s*=\s*([^\|\n]+)',
-            r'\|totalcaps?\s*=\s*([^\|\n]+)',
-            r'\|totalappearances?\s*=\s*([^\|\n]+)',
-        ]
-        for pattern in apps_patterns:
-            match = re.search(pattern, infobox, re.IGNORECASE)
-            if match:
-                apps_text = clean_wiki_text(match.group(1))
-                apps = extract_number(apps_text)
-                if apps is not None:
-                    result['appearances']['career'] = apps
-                    break
-    
-    # Check for |clubcaps= or |clubappearances= format (explicit club appearances field)
-    if 'club' not in result['appearances']:
-        club_apps_patterns = [
-            r'\|clubcaps?\s*=\s*([^\|\n]+)',
-            r'\|clubappearances?\s*=\s*([^\|\n]+)',
-        ]
-        for pattern in club_apps_patterns:
-            club_apps_match = re.search(pattern, infobox, re.IGNORECASE)
-            if club_apps_match:
-                club_apps_text = clean_wiki_text(club_apps_match.group(1))
-                club_apps = extract_number(club_apps_text)
-                if club_apps is not None:
-                    result['appearances']['club'] = club_apps
-                    break
-    
-    # Extract clubs - Pattern to match club entries: years1/clubs1, years2/clubs2, etc.
-    # Find all years/clubs pairs by processing line by line
-    club_dict = {}
-    
-    # Split infobox into lines and process each
-    lines = infobox.split('\n')
-    matched_years = 0
-    matched_clubs = 0
-    sample_line_shown = False
-    for line in lines:
-        orig_line = line
-        line = line.strip()
-        
-        # Match years entries (not youthyears) - pattern should match | years1 or years1
-        years_match = re.match(r'\|?\s*years(\d+)\s*=\s*(.+)', line)
-        if years_match and 'youthyears' not in line:
-            num = years_match.group(1)
-            years = years_match.group(2).strip()
-            if num not in club_dict:
-                club_dict[num] = {}
-            club_dict[num]['years'] = years
-            matched_years += 1
-        
-        # Match clubs entries (not youthclubs) - pattern should match | clubs1 or clubs1
-        clubs_match = re.match(r'\|?\s*clubs(\d+)\s*=\s*(.+)', line)
-        if clubs_match and 'youthclubs' not in line:
-            num = clubs_match.group(1)
-            club = clubs_match.group(2).strip()
-            if num not in club_dict:
-                club_dict[num] = {}
-            club_dict[num]['club'] = club
-            matched_clubs += 1
-    
-    # Process all found club entries
-    for num, data in sorted(club_dict.items(), key=lambda x: int(x[0])):
-        if 'years' not in data or 'club' not in data:
-            continue
-            
-        years = data['years']
-        club = data['club']
-        
-        # Clean up the club name
-        club_name = clean_wiki_text(club)
-        if not club_name:
-            continue
-        
-        # Parse years (could be 2010–2014, 2010–, 2010-present, 2010-2014, etc.)
-        # Handle en dash, em dash, and regular hyphen
-        year_patterns = [
-            r'(\d{4})\s*[–—]\s*(\d{4}|present|Present)?',
-            r'(\d{4})\s*[–—]',  # For formats like "2012–" (present)
-            r'(\d{4})\s*-\s*(\d{4}|present|Present)',
-            r'(\d{4})\s*to\s*(\d{4}|present|Present)',
-        ]
-        
-        parsed = False
-        for year_pattern in year_patterns:
-            year_match = re.match(year_pattern, years)
-            if year_match:
-                start_year = year_match.group(1)
-                end_year = year_match.group(2) if len(year_match.groups()) > 1 and year_match.group(2) else None
-                
-                # If no end year in match, check if years string ends with dash
-                if end_year is None:
-                    if years.endswith('–') or years.endswith('—') or years.endswith('-'):
-                        end_year = 'present'
-                    else:
-                        # Try to extract end year from full string
-                        end_match = re.search(r'(\d{4})$', years)
-                        if end_match:
-                            end_year = end_match.group(1)
-                        else:
-                            end_year = 'present'
-                
-                if end_year:
-                    end_year = end_year.lower()
-                    if end_year == 'present':
-                        result['clubs'].append({
-                            'name': club_name,
-                            'start': start_year,
-                            'end': 'present'
-                        })
-                    elif end_year.isdigit():
-                        result['clubs'].append({
-                            'name': club_name,
-                            'start': start_year,
-                            'end': end_year
-                        })
-                    parsed = True
-                    break
-        
-        if not parsed:
-            # Fallback: try to extract any 4-digit years
-            year_matches = re.findall(r'\d{4}', years)
-            if len(year_matches) >= 1:
-                start_year = year_matches[0]
-                end_year = year_matches[1] if len(year_matches) > 1 else 'present'
-                if end_year == 'present' or not end_year.isdigit():
-                    end_year = 'present'
-                result['clubs'].append({
-                    'name': club_name,
-                    'start': start_year,
-                    'end': end_year
-                })
-    
-    # Only return if we found at least clubs, goals, or appearances (ignore _full_content in check)
-    has_data = bool(result['clubs'] or result['goals'] or result['appearances'])
-    if has_data:
-        return result
-    return None
+def parse_page(page, cache=None):
+    """Parse a page, reusing the cached result for the same revision."""
+    if page.get('parser_version') == PARSER_VERSION:
+        return page['parsed']
+    data = parse_article(page['content'])
+    if cache is not None:
+        cache.put_parsed(page['content'], data, PARSER_VERSION)
+    page['parsed'] = data
+    page['parser_version'] = PARSER_VERSION
+    return data
 
-def search_wikipedia_player(player_name):
-    """Search for player Wikipedia page by name."""
-    params = {
-        "action": "query",
-        "format": "json",
-        "list": "search",
-        "srsearch": player_name,
-        "srlimit": 1
-    }
-    
-    headers = {
-        "User-Agent": "SportVizExperiment/1.0 (https://github.com/ginestra/sport-viz-experiment; contact@example.com)"
-    }
-    
-    try:
-        response = requests.get(WIKIPEDIA_API, params=params, headers=headers, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        search_results = data.get("query", {}).get("search", [])
-        if search_results:
-            return search_results[0]["title"]
-        return None
-    except Exception as e:
-        print(f"Error searching Wikipedia for {player_name}: {e}")
-        return None
+def parse_failure(content):
+    """Why an article's text gave no parse result: its football infobox was not recognized, or it has none."""
+    return 'unrecognized_infobox' if has_football_infobox(content) else 'no_infobox'
 
-def update_player_data(player_name, csv_path):
-    """Update a single player's data from Wikipedia."""
-    print(f"\nProcessing {player_name}...")
-    
-    # Search for the player's Wikipedia page
-    wiki_title = search_wikipedia_player(player_name)
-    if not wiki_title:
-        print(f"  ❌ Could not find Wikipedia page for {player_name}")
+def update_player_data(player_name, page, cache=None):
+    """Parse a single player's resolved Wikipedia page into a PlayerStats (or None), logging what was found."""
+    extra = {'player': player_name}
+    log.debug("Processing %s...", player_name, extra=extra)
+    
+    if not page:
+        if metrics.failures.get(player_name) in TRANSIENT_FAILURES:
+            log.warning("  ❌ Could not fetch Wikipedia page for %s (request failed)", player_name, extra=extra)
+        else:
+            log.warning("  ❌ Could not find Wikipedia page for %s", player_name, extra=extra)
+            metrics.fail(player_name, 'not_found')
         return None
     
-    print(f"  ✅ Found Wikipedia page: {wiki_title}")
+    wiki_title = page['title']
+    log.debug("  ✅ Found Wikipedia page: %s", wiki_title, extra=extra)
     
-    # Fetch the page content
-    content = fetch_wikipedia_page(wiki_title)
+    content = page['content']
     if not content:
-        print(f"  ❌ Could not fetch content for {wiki_title}")
+        log.warning("  ❌ Could not fetch content for %s", wiki_title, extra=extra)
+        metrics.fail(player_name, 'no_content')
         return None
     
     # Parse data from infobox
-    data = parse_infobox(content)
+    data = parse_page(page, cache)
     if not data:
-        # Debug: Check if infobox exists
-        if content and ("Infobox" in content or "infobox" in content):
-            print(f"  ⚠️  Could not parse data from infobox (infobox found but format not recognized)")
+        reason = parse_failure(content)
+        if reason == 'unrecognized_infobox':
+            log.warning("  ⚠️  Could not parse data from infobox for %s (infobox found but format not recognized)",
+                        player_name, extra=extra)
         else:
-            print(f"  ⚠️  Could not parse data from infobox (no infobox found)")
+            log.warning("  ⚠️  Could not parse data from infobox for %s (no football infobox found)", player_name, extra=extra)
+        metrics.fail(player_name, reason)
         return None
     
-    result = {}
-    
-    # Format clubs
-    if data.get('clubs'):
-        formatted_clubs = []
-        for club in data['clubs']:
-            end = club['end'] if club['end'] != 'present' else 'present'
-            formatted_clubs.append(f"{club['name']} ({club['start']}-{end})")
-        result['clubs_with_years'] = ', '.join(formatted_clubs)
-        print(f"  ✅ Found {len(data['clubs'])} clubs")
-    
-    # Update goals
-    if data.get('goals'):
-        goals = data['goals']
-        if 'career' in goals:
-            result['career_goals'] = str(goals['career'])
-            print(f"  ✅ Career goals: {goals['career']}")
-        if 'club' in goals:
-            result['club_goals'] = str(goals['club'])
-            print(f"  ✅ Club goals: {goals['club']}")
-        if 'international' in goals:
-            result['international_goals'] = str(goals['international'])
-            print(f"  ✅ International goals: {goals['international']}")
+    if data.clubs:
+        log.debug("  ✅ Found %d clubs", len(data.clubs), extra=extra)
+    for key, value in data.totals().items():
+        log.debug("  ✅ %s: %s", key.replace('_', ' ').capitalize(), value, extra=extra)
+    if data.honours is not None:
+        log.debug("  ✅ Trophies: %d team, %d individual", data.honours.team_trophies,
+                  data.honours.individual_trophies, extra=extra)
     
-    # Update appearances
-    if data.get('appearances'):
-        apps = data['appearances']
-        if 'career' in apps:
-            result['career_appearances'] = str(apps['career'])
-            print(f"  ✅ Career appearances: {apps['career']}")
-        if 'club' in apps:
-            result['club_appearances'] = str(apps['club'])
-            print(f"  ✅ Club appearances: {apps['club']}")
-        
-        if 'international' in apps:
-            result['international_appearances'] = str(apps['international'])
-            print(f"  ✅ International appearances: {apps['international']}")
-    
-    return result if result else None
+    return data
 
-def main():
-    """Main function to update all players in CSV."""
-    script_dir = Path(__file__).parent
-    project_root = script_dir.parent
-    csv_path = project_root / "public" / "data" / "players.csv"
-    
-    if not csv_path.exists():
-        print(f"Error: CSV file not found at {csv_path}")
-        return 1
-    
-    # Read existing CSV
-    players = []
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        players = list(reader)
-    
-    print(f"Found {len(players)} players in CSV")
-    print("\nStarting Wikipedia data update...")
-    print("=" * 50)
-    
+def report_changes(player, updates, target):
+    """Log the fields `updates` would change for a row of `target`; return how many."""
+    changes = [
+        (key, player.get(key, ''), value)
+        for key, value in updates.items()
+        if value and value != player.get(key, '')
+    ]
+    if changes:
+        log.info("\n%s (%s)", player['name'], target.filename)
+        for key, old, new in changes:
+            log.info("  %s: %s → %s", key, old or '(empty)', new, extra={'player': player['name'], 'field': key})
+    return len(changes)
+
+def peak_rss_mb(who='self'):
+    """Peak resident set size in MB of this process ('self') or its reaped workers ('children')."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF if who == 'self' else resource.RUSAGE_CHILDREN)
+    # ru_maxrss is in kilobytes on Linux but in bytes on macOS
+    return usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+def bytes_per_player():
+    """API bytes downloaded per player sent through the pipeline, or None."""
+    fetched = metrics.counters.get('players_fetched', 0)
+    return client.stats.bytes / fetched if fetched else None
+
+def run_report(status, updated_count, failed_count, cache):
+    """The JSON run report: metrics plus request, cache and player totals."""
+    stats = client.stats
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    return metrics.report(
+        status=status,
+        parser_version=PARSER_VERSION,
+        requests={
+            'total': stats.requests,
+            'bytes': stats.bytes,
+            'bytes_per_player': bytes_per_player(),
+            'retries': stats.retries,
+            'failed': stats.failures,
+            'reconnects': client.reconnects(),
+        },
+        cache={
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': hits / (hits + misses) if hits + misses else None,
+        },
+        players={'updated': updated_count, 'failed': failed_count},
+        peak_rss_mb={'self': peak_rss_mb(), 'children': peak_rss_mb('children')},
+    )
+
+def write_prometheus(path, report):
+    """Write the run's metrics to a node_exporter textfile."""
+    write_atomic(path, metrics.prometheus({
+        'requests': {'label': 'kind', 'values': {
+            key: value for key, value in report['requests'].items() if not key.startswith('bytes')
+        }},
+        'downloaded_bytes': report['requests']['bytes'],
+        'downloaded_bytes_per_player': report['requests']['bytes_per_player'],
+        'cache_lookups': {'label': 'result', 'values': {
+            'hit': report['cache']['hits'], 'miss': report['cache']['misses'],
+        }},
+        'players': {'label': 'result', 'values': report['players']},
+        'peak_rss_megabytes': report['peak_rss_mb']['self'],
+        'exit_status': report['status'],
+        'last_run_timestamp_seconds': int(metrics.started),
+    }))
+
+def parse_args(argv=None):
+    """Parse the command line: a command (update by default) and its options."""
+    argv = list(sys.argv[1:] if argv is None else argv)
+    # Without a command the script updates every player, as it always has
+    if not argv or argv[0] not in COMMANDS + ('-h', '--help'):
+        argv.insert(0, 'update')
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--cache-path', type=Path, default=DEFAULT_CACHE_PATH,
+                        help="SQLite page cache location (default: %(default)s)")
+    common.add_argument('--cache-size', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help="maximum cached wikitext in MB before LRU eviction (default: %(default)s)")
+    common.add_argument('--dataset', action='append', dest='datasets', choices=list(TARGETS), metavar='NAME',
+                        help="only update this target dataset (repeatable): " + ", ".join(TARGETS)
+                             + " (default: all of them)")
+    common.add_argument('--index-path', type=Path, default=DEFAULT_INDEX_PATH,
+                        help="player name -> Wikipedia page id index (default: %(default)s)")
+    common.add_argument('--workers', type=int,
+                        help="infobox parser processes (default: one per CPU core)")
+    common.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help="least severe messages to log; DEBUG lists what was found for every player (default: %(default)s)")
+    common.add_argument('--log-format', default='text', choices=['text', 'json'],
+                        help="plain messages, or one JSON object per line (default: %(default)s)")
+    common.add_argument('--report', type=Path,
+                        help="write a JSON run report (stage timings, requests, cache, failures) to this file")
+    common.add_argument('--metrics-textfile', type=Path,
+                        help="write the run's metrics in Prometheus text format, e.g. for node_exporter's textfile collector")
+
+    network = argparse.ArgumentParser(add_help=False)
+    network.add_argument('--rate', type=float,
+                         help=f"maximum API requests per second (default: {client.DEFAULT_RATE:g}, "
+                              "split evenly between the shards with --shard I/N)")
+    network.add_argument('--burst', type=int, default=1,
+                         help="requests allowed back-to-back after an idle period (default: %(default)s)")
+    network.add_argument('--concurrency', type=int, default=client.DEFAULT_CONCURRENCY,
+                         help="maximum API requests in flight (default: %(default)s)")
+    network.add_argument('--api-url', default=wikipedia.WIKIPEDIA_API,
+                         help="MediaWiki API endpoint, e.g. a local stub server for testing")
+    network.add_argument('--full-pages', action='store_true',
+                         help="download whole articles instead of just their lead section (where the infobox is)")
+    network.add_argument('--no-cache', action='store_true',
+                         help="ignore the page cache and download every page again")
+    network.add_argument('--reindex', action='store_true',
+                         help="ignore the player index and resolve every player by name again")
+
+    selection = argparse.ArgumentParser(add_help=False)
+    selection.add_argument('--player', action='append', dest='players', metavar='NAME',
+                           help="only this player (repeatable); other rows are left as they are")
+
+    parser = argparse.ArgumentParser(description="Update player data from Wikipedia.")
+    commands = parser.add_subparsers(dest='command', metavar='COMMAND')
+
+    update = commands.add_parser('update', parents=[common, network, selection],
+                                 help="fetch players' pages and update the data files (the default)")
+    update.add_argument('--dry-run', action='store_true',
+                        help="print what would change instead of writing the data files")
+    update.add_argument('--dump', type=Path,
+                        help="read pages from a local pages-articles XML dump (.xml or .xml.bz2) instead of the API")
+    update.add_argument('--shard', type=parse_shard, metavar='I/N',
+                        help="only update shard I of N (1-based, by a stable hash of the player name) and save the "
+                             "results for merge-player-data.py instead of writing the CSV")
+    update.add_argument('--shard-output', type=Path,
+                        help="result file of a --shard run (default: .cache/shards/shard-I-of-N.json)")
+    update.add_argument('--journal-path', type=Path,
+                        help="checkpoint journal an interrupted run resumes from "
+                             "(default: .cache/update-journal.jsonl, one per shard with --shard)")
+    update.add_argument('--checkpoint-every', type=int, default=DEFAULT_CHECKPOINT_EVERY,
+                        help="players between journal checkpoints (default: %(default)s)")
+    update.add_argument('--restart', action='store_true',
+                        help="ignore the journal of an interrupted run and start over")
+    update.set_defaults(reparse=False, write=False)
+
+    reparse = commands.add_parser('reparse', parents=[common, selection],
+                                  help="replay cached pages through the current parser (no network) and print what would change")
+    reparse.add_argument('--write', action='store_true',
+                         help="also save the changes to the data files")
+    reparse.set_defaults(reparse=True, dry_run=False, dump=None, shard=None, shard_output=None,
+                         no_cache=False, reindex=False)
+
+    watch = commands.add_parser('watch', parents=[common, network],
+                                help="keep running, updating players as their Wikipedia pages are edited")
+    watch.add_argument('--interval', type=float, default=DEFAULT_INTERVAL,
+                       help="seconds between checks of the players' pages (default: %(default)s)")
+    watch.add_argument('--state', type=Path, default=DEFAULT_STATE_PATH,
+                       help="where the watcher keeps the page revisions it is up to date with (default: %(default)s)")
+    watch.add_argument('--cycles', type=int,
+                       help="stop after this many polls (default: run until interrupted)")
+    watch.set_defaults(reparse=False, write=False, dry_run=False, dump=None, shard=None, shard_output=None,
+                       players=None, journal_path=None, checkpoint_every=DEFAULT_CHECKPOINT_EVERY, restart=False)
+
+    args = parser.parse_args(argv)
+    if args.command == 'update':
+        if args.shard_output and not args.shard:
+            update.error("--shard-output only applies to --shard")
+        if args.shard and (args.players or args.dry_run):
+            update.error("--shard cannot be combined with --player or --dry-run")
+    return args
+
+def request_rate(args):
+    """
+    The request rate of a run: --rate, or else the budget agreed with
+    Wikipedia, divided by N for --shard I/N since the N shards of a run
+    send their requests at the same time.
+    """
+    if args.rate is not None:
+        return args.rate
+    return client.DEFAULT_RATE / (args.shard[1] if args.shard else 1)
+
+def finish(args, status, updated_count=0, failed_count=0, cache=None):
+    """Write the run report and metrics textfile if asked for; returns `status`."""
+    if args.report or args.metrics_textfile:
+        report = run_report(status, updated_count, failed_count, cache)
+        if args.report:
+            write_report(args.report, report)
+            log.info("Run report saved to %s", args.report)
+        if args.metrics_textfile:
+            write_prometheus(args.metrics_textfile, report)
+    return status
+
+def run(args, only=None):
+    """
+    Update the players in the target CSVs (or the shard of them given by
+    --shard, or just the players named in `only` or by --player) and write
+    the results, or with --dry-run print what would change.
+    """
+    only = only if only is not None else args.players
+    dry_run = args.dry_run or (args.reparse and not args.write)
+    targets = select_targets(args.datasets)
+    
+    # Read existing CSVs
+    tables = {}
+    for target in targets:
+        csv_path = target.path()
+        if not csv_path.exists():
+            log.error("Error: CSV file not found at %s", csv_path)
+            return finish(args, 1)
+        tables[target] = target.read()
+        log.info("Found %d players in %s", len(tables[target]), target.filename)
+    csv_paths = [target.path() for target in targets]
+    
+    # Every row of every target, by player name
+    players_by_name = {}
+    for target, players in tables.items():
+        for player in players:
+            players_by_name.setdefault(player['name'], []).append((target, player))
+    # The rows this run resolves clubs for
+    rows = [player for target, players in tables.items() if target.clubs for player in players]
+    if args.shard:
+        shard_index, shard_count = args.shard
+        players_by_name = {
+            name: found for name, found in players_by_name.items()
+            if shard_of(name, shard_count) == shard_index
+        }
+        rows = [player for found in players_by_name.values() for target, player in found if target.clubs]
+        log.info("Shard %d/%d: %d players", shard_index, shard_count, len(players_by_name))
+    elif only is not None:
+        unknown = [name for name in only if name not in players_by_name]
+        for name in unknown:
+            suggestions = difflib.get_close_matches(name, players_by_name, n=3)
+            log.error("Error: %s is not in %s%s", name, ", ".join(target.filename for target in targets),
+                      f" (did you mean {', '.join(suggestions)}?)" if suggestions else "")
+        if unknown:
+            return finish(args, 1)
+        players_by_name = {name: players_by_name[name] for name in only}
+    
+    log.info("\nStarting Wikipedia data update...")
+    log.info("=" * 50)
     updated_count = 0
     failed_count = 0
-    
-    for player in players:
-        player_name = player['name']
-        updates = update_player_data(player_name, csv_path)
+    changed_fields = 0
+    
+    # Pages are resolved and fetched in batches of up to 50 players per API
+    # round-trip, several batches at once, paced by the rate limiter, and
+    # parsed on a process pool while later batches are still downloading.
+    # Only pages edited since the cached copy are downloaded. With --dump they
+    # are streamed from a local dump instead, and with reparse only the
+    # cached wikitext is replayed. Players found on an earlier run are
+    # fetched straight by page id. Each page is fetched and parsed once,
+    # however many targets list its player.
+    cache = PageCache(args.cache_path, args.cache_size * 1024 * 1024, read=not args.no_cache)
+    index = PlayerIndex(args.index_path, read=not args.reindex)
+    # Replaying the cache and reading a dump stay off the network altogether
+    registry = ClubRegistry(cache, offline=args.reparse or args.dump is not None)
+    # Parse results by player name (None when not found or not parsed),
+    # and the {'pageid', 'title', 'revid'} of the pages players resolved to
+    parsed = {}
+    found_pages = {}
+    # Players are checkpointed as they finish, so an interrupted run picks
+    # up where it stopped (replaying cached pages needs no checkpoints, and
+    # watch mode keeps track of the revisions it has written)
+    journal = None
+    if not args.reparse and only is None and not dry_run:
+        source = f"dump:{args.dump.resolve()}" if args.dump else f"api:{args.api_url}"
+        shard = "{}/{}".format(*args.shard) if args.shard else "all"
+        journal = Journal(args.journal_path or default_journal_path(args.shard),
+                          fingerprint(csv_paths, source, shard),
+                          args.checkpoint_every, resume=not args.restart)
+        for player_name, entry in journal.entries.items():
+            parsed[player_name] = entry['parsed']
+            if entry['page']:
+                found_pages[player_name] = entry['page']
+                index.record(player_name, entry['page'])
+            if entry['failure']:
+                metrics.fail(player_name, entry['failure'])
+        if journal.entries:
+            log.info("Resuming an interrupted run: %d players already done", len(journal.entries))
+            metrics.count('resumed_players', len(journal.entries))
+    names = [name for name in players_by_name if name not in parsed]
+    if not args.reparse:
+        metrics.count('players_fetched', len(names))
+    if args.reparse:
+        from playerdata.reparse import iter_cached_player_pages
+        log.info("Reparsing cached pages (no network access)")
+        pages = iter_cached_player_pages(names, cache, index, args.workers)
+    elif args.dump:
+        from playerdata.dump import iter_dump_player_pages
+        log.info("Reading pages from dump %s", args.dump)
+        pages = iter_dump_player_pages(args.dump, names, args.workers, cache, index)
+    else:
+        from playerdata.pipeline import iter_player_pages
+        # Only the players of targets that read past the lead section
+        # (honours) need their whole articles
+        full_pages = {
+            name for name in names
+            if any(target.full_pages for target, _ in players_by_name[name])
+        }
+        pages = iter_player_pages(names, args.concurrency, cache, args.workers, index, full_pages=full_pages)
+    try:
+        for player_name, page in pages:
+            if looks_like_player_page(page):
+                found_pages[player_name] = {
+                    'pageid': int(page['pageid']), 'title': page['title'], 'revid': page.get('revid'),
+                }
+                index.record(player_name, page)
+            if args.reparse:
+                parsed[player_name] = page.get('parsed') if page else None
+                if parsed[player_name] is None:
+                    metrics.fail(player_name, 'not_cached' if page is None else parse_failure(page['content']))
+            else:
+                with metrics.timer('update'):
+                    parsed[player_name] = update_player_data(player_name, page, cache)
+                if journal is not None:
+                    journal.record(
+                        player_name, parsed[player_name], found_pages.get(player_name),
+                        metrics.failures.get(player_name),
+                    )
         
-        if updates:
-            # Update all fields that were found
-            for key, value in updates.items():
-                # Add new columns if they don't exist (for appearances)
-                if key not in player:
-                    # We'll add these columns when writing
-                    pass
-                # Only update if value exists and is different
-                if value and (key not in player or value != player.get(key, '')):
-                    player[key] = value
+        # Club spells as parsed, identified by the articles they link to
+        # (resolved for every row at once, so lookups are batched)
+        spells = {
+            player_name: spells_from_stats(data)
+            for player_name, data in parsed.items()
+            if data is not None and data.clubs
+        }
+        with metrics.timer('clubs'):
+            resolve_clubs(rows, spells, registry)
+    finally:
+        # Stops the pipeline if the loop above was cut short, before the
+        # cache its threads write to is closed
+        pages.close()
+        if journal is not None:
+            journal.checkpoint()
+        cache.close()
+    
+    # Every parse result fans out to the targets that list the player
+    updates_by_name = {}
+    for player_name, data in parsed.items():
+        updates_by_target = updates_by_name[player_name] = {}
+        for target, player in players_by_name[player_name]:
+            if target.name not in updates_by_target:
+                updates_by_target[target.name] = target.updates(data, registry) if data is not None else None
+            updates = updates_by_target[target.name]
+            if updates:
+                if args.reparse or args.dry_run:
+                    changed_fields += report_changes(player, updates, target)
+                apply_updates(player, updates)
+        if any(updates_by_target.values()):
             updated_count += 1
         else:
             failed_count += 1
-        
-        # Be respectful - add delay between requests (Wikipedia recommends at least 1 second)
-        time.sleep(2)
+    
+    # A shard's players are saved for the merge, the index with them (other
+    # shards' entries must not be pruned); a run over some players only adds entries
+    if not args.shard and not dry_run:
+        if only is None:
+            index.prune(players_by_name)
+        with metrics.timer('save_index'):
+            saved = index.save()
+        if saved:
+            log.info("Player index saved to %s", index.path)
+    
+    stats = client.stats
+    log.info("\nAPI requests: %d (%.0f KB, %.1f KB per player), retries: %d, failed requests: %d, reconnects: %d",
+             stats.requests, stats.bytes / 1024, (bytes_per_player() or 0) / 1024,
+             stats.retries, stats.failures, client.reconnects())
+    log.info("Page cache: %d unchanged pages reused, %d downloaded", cache.hits, cache.misses)
+    if resource is not None:
+        log.info("Peak memory: %.0f MB (parser workers: %.0f MB)", peak_rss_mb(), peak_rss_mb('children'))
+    failures = metrics.failure_counts()
+    if failures:
+        log.info("Failures: %s", ", ".join(f"{reason} {count}" for reason, count in failures.items()))
+    
+    if dry_run:
+        log.info("\n%s", '=' * 50)
+        if args.reparse:
+            log.info("%d fields would change; %d players have no cached page or parse result", changed_fields, failed_count)
+            log.info("Run again with --write to save the changes")
+        else:
+            log.info("%d fields would change; %d players could not be updated", changed_fields, failed_count)
+            log.info("Run again without --dry-run to save the changes")
+        return finish(args, 0, updated_count, failed_count, cache)
+    
+    if args.shard:
+        shard_path = args.shard_output or default_shard_path(args.shard)
+        titles = {
+            registry.title_for(name, link)
+            for player in rows
+            for name, _, _, link in row_spells(player, spells)
+        }
+        write_shard(shard_path, args.shard, fingerprint(csv_paths), [target.name for target in targets], {
+            player_name: {
+                'updates': updates_by_name[player_name],
+                'spells': spells.get(player_name),
+                'page': found_pages.get(player_name),
+                'failure': metrics.failures.get(player_name),
+            }
+            for player_name in parsed
+        }, registry.resolutions(titles))
+        journal.remove()
+        log.info("\n%s", '=' * 50)
+        log.info("✅ Updated %d players", updated_count)
+        if failed_count > 0:
+            log.warning("⚠️  Could not update %d players (manual check may be needed)", failed_count)
+        log.info("Shard results saved to %s (combine them with merge-player-data.py)", shard_path)
+        return finish(args, 0 if updated_count else 1, updated_count, failed_count, cache)
     
     if updated_count > 0:
-        # Determine all possible fieldnames (including new ones like appearances)
-        all_fieldnames = set(players[0].keys())
-        for player in players:
-            all_fieldnames.update(player.keys())
-        
-        # Order fieldnames logically
-        standard_order = [
-            'name', 'country_provenance', 'national_team',
-            'career_goals', 'career_assists', 'career_appearances',
-            'club_goals', 'club_assists', 'club_appearances',
-            'international_goals', 'international_assists', 'international_appearances',
-            'clubs_with_years'
-        ]
-        
-        # Build ordered fieldnames list
-        ordered_fieldnames = []
-        for field in standard_order:
-            if field in all_fieldnames:
-                ordered_fieldnames.append(field)
-        # Add any remaining fields
-        for field in sorted(all_fieldnames):
-            if field not in ordered_fieldnames:
-                ordered_fieldnames.append(field)
-        
-        # Write updated CSV
-        with open(csv_path, 'w', encoding='utf-8', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=ordered_fieldnames)
-            writer.writeheader()
-            writer.writerows(players)
+        # Write updated CSVs (atomically, and not at all if nothing changed),
+        # and the columnar dataset (with the connection graph) for the frontend
+        written = [file for target in targets for file in target.write(tables[target], spells, registry)]
+        if journal is not None:
+            journal.remove()
         
-        print(f"\n{'=' * 50}")
-        print(f"✅ Updated {updated_count} players")
+        log.info("\n%s", '=' * 50)
+        log.info("✅ Updated %d players", updated_count)
         if failed_count > 0:
-            print(f"⚠️  Could not update {failed_count} players (manual check may be needed)")
-        print(f"CSV file saved to {csv_path}")
-        return 0
+            log.warning("⚠️  Could not update %d players (manual check may be needed)", failed_count)
+        for label, path, saved in written:
+            log.info("%s %s %s", label, "saved to" if saved else "unchanged at", path)
+        return finish(args, 0, updated_count, failed_count, cache)
     else:
-        print("\n⚠️  No players were updated. This could mean:")
-        print("   - Wikipedia pages not found")
-        print("   - Infobox format not recognized")
-        print("   - No changes detected")
-        return 1
+        if journal is not None:
+            journal.remove()
+        log.warning("\n⚠️  No players were updated. This could mean:")
+        log.warning("   - Wikipedia pages not found")
+        log.warning("   - Infobox format not recognized")
+        log.warning("   - No changes detected")
+        return finish(args, 1, updated_count, failed_count, cache)
+
+def watch(args):
+    """
+    Poll the revisions of the indexed players' pages every --interval
+    seconds and update the players whose pages were edited, until
+    interrupted.
+    """
+    state = WatchState(args.state, args.api_url)
+    if state.revids is None:
+        # Catch up first: every player's page is checked for edits since the
+        # cache (by revision id, 50 pages a request); what that run fetched
+        # is then the starting point, through the cache
+        log.info("No watch state yet: updating every player once, then watching their pages")
+        run(args)
+        state.save({})
+    cycles = 0
+    try:
+        while True:
+            # Each cycle reports (and writes the metrics textfile) for itself
+            metrics.reset()
+            client.stats = client.RequestStats()
+            # Reloaded every time: the index learns about newly found players
+            tracked = {}
+            for name, entry in PlayerIndex(args.index_path).entries.items():
+                tracked.setdefault(entry['pageid'], []).append(name)
+            known = {pageid: state.revids[pageid] for pageid in tracked if pageid in state.revids}
+            unknown = [pageid for pageid in tracked if pageid not in known]
+            if unknown:
+                cache = PageCache(args.cache_path, args.cache_size * 1024 * 1024, read=not args.no_cache)
+                for pageid in unknown:
+                    cached = cache.latest(pageid) if cache.read else None
+                    known[pageid] = cached['revid'] if cached else None
+                cache.close()
+            with metrics.timer('watch_poll'):
+                pageids, current = edited_pages(known)
+            names = sorted({name for pageid in pageids for name in tracked[pageid]})
+            log.info("%d tracked pages checked, %d edited", len(current), len(pageids))
+            if names:
+                metrics.count('watch_updates', len(names))
+                log.info("Updating %s", ", ".join(names))
+                failed = set(metrics.failures) if run(args, only=names) == 0 else set(names)
+                # Pages some player could not be updated from stay at the
+                # revision the data has, so they are tried again next time
+                retry = {pageid for pageid in pageids
+                         if current[pageid] is not None and failed.intersection(tracked[pageid])}
+                if retry:
+                    log.warning("%d edited pages will be checked again", len(retry))
+                    current.update({pageid: known[pageid] for pageid in retry})
+            # Only moved forward once the edits are saved, so a restart never skips any
+            state.save(current)
+            cycles += 1
+            if args.cycles and cycles >= args.cycles:
+                return 0
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        log.info("Stopped watching")
+        return 0
+
+def main(argv=None):
+    """Main function to update all players in CSV."""
+    args = parse_args(argv)
+    logsetup.configure(args.log_level, args.log_format)
+    if args.command != 'reparse':
+        wikipedia.configure(api_url=args.api_url, lead_only=not args.full_pages)
+        client.configure(rate=request_rate(args), burst=args.burst, concurrency=args.concurrency)
+    if args.command == 'watch':
+        return watch(args)
+    return run(args)
 
 if __name__ == "__main__":
     exit(main())